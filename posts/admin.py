@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from . import search
+from .export import export_response
 from .models import Group, Post, Comment, Follow
 
 
@@ -8,6 +10,21 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ("text",)
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
+    actions = ("export_jsonl", "export_csv")
+
+    def get_search_results(self, request, queryset, search_term):
+        if not (search.available() and search.build_query(search_term)):
+            return super().get_search_results(request, queryset,
+                                              search_term)
+        return queryset.filter(pk__in=search.matching_ids(search_term)), False
+
+    def export_jsonl(self, request, queryset):
+        return export_response(queryset, "jsonl", "posts")
+    export_jsonl.short_description = "Выгрузить в JSONL"
+
+    def export_csv(self, request, queryset):
+        return export_response(queryset, "csv", "posts")
+    export_csv.short_description = "Выгрузить в CSV"
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -19,7 +36,7 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'author', 'text', 'created')
+    list_display = ('post', 'author', 'excerpt', 'created')
     search_fields = ('author', 'text')
     empty_value_display = '-пусто-'
 
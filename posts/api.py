@@ -0,0 +1,101 @@
+import hashlib
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_safe
+
+from .generations import generations
+from .models import Group, Post, User
+from .pagination import KeysetPaginator
+
+PER_PAGE = 20
+COMMENTS_LIMIT = 50
+JSON_PARAMS = {"ensure_ascii": False, "separators": (",", ":")}
+
+
+def _etag(request, *scopes):
+    """
+    ETag по номерам поколений: тело не строится, база не читается.
+    Адрес с параметрами входит в тег, чтобы страницы различались.
+    """
+    marker = repr((request.get_full_path(), generations(*scopes)))
+    return hashlib.md5(marker.encode()).hexdigest()
+
+
+def _index_etag(request):
+    return _etag(request, "index", "groups")
+
+
+def _group_etag(request, slug):
+    pk = Group.objects.filter(slug=slug).values_list("pk", flat=True).first()
+    return pk and _etag(request, f"group:{pk}")
+
+
+def _profile_etag(request, username):
+    pk = User.objects.filter(
+        username=username
+    ).values_list("pk", flat=True).first()
+    return pk and _etag(request, f"author:{pk}", "groups")
+
+
+def _post_etag(request, post_id):
+    return _etag(request, f"post:{post_id}", "groups")
+
+
+def serialize_post(post):
+    return {
+        "id": post.id,
+        "author": post.author.username,
+        "group": post.group.slug if post.group_id else None,
+        "text": post.text,
+        "pub_date": post.pub_date,
+        "image": post.image.url if post.image else None,
+        "comment_count": post.comment_count,
+    }
+
+
+def _feed_response(request, queryset):
+    paginator = KeysetPaginator(queryset, PER_PAGE)
+    page = paginator.get_page(after=request.GET.get("after"),
+                              before=request.GET.get("before"))
+    return JsonResponse({
+        "results": [serialize_post(post) for post in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    }, json_dumps_params=JSON_PARAMS)
+
+
+@require_safe
+@condition(etag_func=_index_etag)
+def index(request):
+    return _feed_response(request, Post.objects.for_feed("text"))
+
+
+@require_safe
+@condition(etag_func=_group_etag)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed_response(request, group.posts.for_feed("text"))
+
+
+@require_safe
+@condition(etag_func=_profile_etag)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return _feed_response(request, author.posts.for_feed("text"))
+
+
+@require_safe
+@condition(etag_func=_post_etag)
+def post_view(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed("text"), id=post_id)
+    comments = post.comments.select_related("author").order_by(
+        "created", "id"
+    )[:COMMENTS_LIMIT]
+    data = serialize_post(post)
+    data["comments"] = [
+        {"id": comment.id, "author": comment.author.username,
+         "text": comment.text, "created": comment.created}
+        for comment in comments
+    ]
+    return JsonResponse(data, json_dumps_params=JSON_PARAMS)
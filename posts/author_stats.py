@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counters, follow_graph, replicas
+from .models import User, UserStats
+
+STATS_KEY = "posts:author_stats:{}"
+COUNTERS = ("post_count", "follower_count", "following_count")
+
+AuthorStats = namedtuple(
+    "AuthorStats",
+    "post_count follower_count following_count following",
+)
+
+
+def _timeout():
+    return replicas.cache_timeout(settings.POSTS_AUTHOR_STATS_TIMEOUT)
+
+
+def author_stats(author, viewer=None):
+    """
+    Счётчики автора для боковой карточки и подписан ли на него viewer,
+    одним get_many из кэша: подписка проверяется по множеству подписок
+    viewer из графа подписок. Ключи сбрасывают сигналы Post и Follow
+    (posts.signals), при промахе счётчики читаются из UserStats.
+    """
+    keys = [STATS_KEY.format(author.pk)]
+    check_follow = (viewer is not None and viewer.is_authenticated
+                    and viewer.pk != author.pk)
+    if check_follow:
+        keys.append(follow_graph.followees_key(viewer.pk))
+    found = cache.get_many(keys)
+    missing = {}
+
+    counts = found.get(keys[0])
+    if counts is None:
+        counts = UserStats.objects.filter(user_id=author.pk).values_list(
+            *COUNTERS
+        ).first()
+        if counts is None:
+            stats = counters.recount_user(author.pk)
+            counts = tuple(getattr(stats, field) for field in COUNTERS)
+        missing[keys[0]] = counts
+    following = False
+    if check_follow:
+        followees = found.get(keys[1])
+        if followees is None:
+            followees = follow_graph.load_followees([viewer.pk])[viewer.pk]
+        following = author.pk in followees
+
+    if missing:
+        cache.set_many(missing, _timeout())
+    return AuthorStats(*counts, following)
+
+
+def forget(*user_ids):
+    cache.delete_many([STATS_KEY.format(user_id) for user_id in user_ids])
+
+
+def forget_all(chunk_size=1000):
+    """После массового пересчёта UserStats в обход сигналов."""
+    user_ids = User.objects.values_list("pk", flat=True).order_by("pk")
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=chunk_size):
+        chunk.append(user_id)
+        if len(chunk) == chunk_size:
+            forget(*chunk)
+            chunk = []
+    forget(*chunk)
@@ -0,0 +1,230 @@
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.template.backends.django import Template
+from django.urls import reverse
+
+from . import writes
+from .models import Comment, Group, Post, UserStats
+
+PERCENTILES = (50, 95, 99)
+
+
+@contextmanager
+def template_timer():
+    """
+    Суммирует время отрисовки шаблонов. Замеряется вызов шаблона
+    верхнего уровня, поэтому время include входит во время родителя.
+    """
+    spent = [0.0]
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            spent[0] += time.perf_counter() - started
+
+    Template.render = render
+    try:
+        yield spent
+    finally:
+        Template.render = original
+
+
+@contextmanager
+def sql_timer():
+    """Число запросов SQL и их суммарное время с точностью perf_counter."""
+    stats = {'queries': 0, 'seconds': 0.0}
+
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats['queries'] += 1
+            stats['seconds'] += time.perf_counter() - started
+
+    with connection.execute_wrapper(wrapper):
+        yield stats
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(client, method, path, data=None, iterations=30, warmup=3):
+    """Задержка, число и время запросов SQL и время шаблонов для URL."""
+    def request():
+        response = getattr(client, method)(path, data() if data else None)
+        if response.status_code >= 400:
+            raise AssertionError(f'{method.upper()} {path} вернул '
+                                 f'{response.status_code}')
+
+    for _ in range(warmup):
+        request()
+
+    latencies, queries, sql_times, template_times = [], [], [], []
+    for _ in range(iterations):
+        with sql_timer() as sql, template_timer() as spent:
+            started = time.perf_counter()
+            request()
+            latencies.append(time.perf_counter() - started)
+        queries.append(sql['queries'])
+        sql_times.append(sql['seconds'])
+        template_times.append(spent[0])
+
+    result = {f'p{pct}_ms': round(percentile(latencies, pct) * 1000, 3)
+              for pct in PERCENTILES}
+    result.update({
+        'queries': max(queries),
+        'sql_ms': round(sum(sql_times) / iterations * 1000, 3),
+        'template_ms': round(sum(template_times) / iterations * 1000, 3),
+        'iterations': iterations,
+    })
+    return result
+
+
+def scenarios():
+    """
+    Сценарии для наполненной базы: самая крупная группа, самый активный
+    автор, самая обсуждаемая запись. Возвращает читателя с наибольшим
+    числом подписок и список (имя, метод, путь, фабрика данных формы).
+    """
+    reader = (UserStats.objects.select_related('user')
+              .order_by('-following_count').first().user)
+    author = (UserStats.objects.select_related('user')
+              .order_by('-post_count').first().user)
+    post = Post.objects.select_related('author').order_by(
+        '-comment_count'
+    ).first()
+    group = (Group.objects.annotate(size=Count('posts'))
+             .filter(size__gt=0).order_by('-size').first())
+    post_kwargs = {'username': post.author.username, 'post_id': post.id}
+
+    views = [
+        ('index', 'get', reverse('index'), None),
+        ('profile', 'get', reverse('profile', args=[author.username]), None),
+        ('post_view', 'get', reverse('post', kwargs=post_kwargs), None),
+        ('follow_index', 'get', reverse('follow_index'), None),
+        ('new_post', 'post', reverse('new_post'),
+         lambda: {'text': 'Запись из бенчмарка'}),
+        ('add_comment', 'post', reverse('add_comment', kwargs=post_kwargs),
+         lambda: {'text': 'Комментарий из бенчмарка'}),
+    ]
+    if group is not None:
+        views.insert(1, ('group_posts', 'get',
+                         reverse('group', args=[group.slug]), None))
+    return reader, views
+
+
+def run(client, iterations=30, warmup=3):
+    reader, views = scenarios()
+    client.force_login(reader)
+    return {
+        name: measure(client, method, path, data, iterations, warmup)
+        for name, method, path, data in views
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Регрессии относительно сохранённых результатов: p95 выросла больше
+    чем на tolerance или стало больше запросов SQL.
+    """
+    regressions = []
+    for size, views in results.items():
+        for view, metrics in views.items():
+            base = baseline.get(size, {}).get(view)
+            if base is None:
+                continue
+            if metrics['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{size}/{view}: p95 {base["p95_ms"]} -> '
+                    f'{metrics["p95_ms"]} мс'
+                )
+            if metrics['queries'] > base['queries']:
+                regressions.append(
+                    f'{size}/{view}: запросов {base["queries"]} -> '
+                    f'{metrics["queries"]}'
+                )
+    return regressions
+
+
+def contention(writers=4, readers=4, seconds=5.0, seed=1):
+    """
+    Одновременные запись и чтение из нескольких потоков, у каждого своё
+    соединение. Писатели чередуют новые записи и комментарии через
+    posts.writes, как представления; читатели открывают первую страницу
+    ленты. Возвращает пропускную способность, p95 задержек и число
+    отказов записи.
+    """
+    author_ids = list(UserStats.objects.values_list('user_id', flat=True))
+    post_ids = list(Post.objects.values_list('id', flat=True)[:1000])
+    lock = threading.Lock()
+    stats = {'writes': [], 'reads': [], 'errors': 0}
+    deadline = time.perf_counter() + seconds
+
+    def write(rng, step):
+        if step % 2:
+            writes.run(Comment.objects.create,
+                       post_id=rng.choice(post_ids),
+                       author_id=rng.choice(author_ids),
+                       text='Комментарий из бенчмарка')
+        else:
+            writes.run(Post.objects.create,
+                       author_id=rng.choice(author_ids),
+                       text='Запись из бенчмарка')
+
+    def read(rng, step):
+        list(Post.objects.for_feed()[:10])
+
+    def worker(action, kind, number):
+        rng = random.Random(seed * 1000 + number)
+        latencies, errors, step = [], 0, 0
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    action(rng, step)
+                except (OperationalError, writes.WriteBusy):
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+                step += 1
+        finally:
+            connection.close()
+        with lock:
+            stats[kind].extend(latencies)
+            stats['errors'] += errors
+
+    threads = [
+        threading.Thread(target=worker, args=(write, 'writes', number))
+        for number in range(writers)
+    ] + [
+        threading.Thread(target=worker, args=(read, 'reads', number))
+        for number in range(writers, writers + readers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {'errors': stats['errors'], 'seconds': round(elapsed, 3)}
+    for kind in ('writes', 'reads'):
+        latencies = stats[kind]
+        result[f'{kind}_per_s'] = round(len(latencies) / elapsed, 1)
+        result[f'{kind}_p95_ms'] = round(
+            percentile(latencies, 95) * 1000, 3
+        ) if latencies else None
+    return result
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connections, router
+from django.db.models import Max
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def returns_ids(model):
+    """Заполняет ли bulk_create первичные ключи (в SQLite — нет)."""
+    connection = connections[router.db_for_write(model)]
+    return connection.features.can_return_ids_from_bulk_insert
+
+
+@contextmanager
+def explicit_dates(model, *field_names):
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_insert(model, objects, batch_size):
+    """
+    bulk_create с пачками не больше, чем допускает СУБД: Django 2.2 не
+    ограничивает явно переданный batch_size, и SQLite отвечает ошибкой
+    «too many terms in compound SELECT».
+    """
+    connection = connections[router.db_for_write(model)]
+    limit = connection.ops.bulk_batch_size(model._meta.concrete_fields,
+                                           objects)
+    return model.objects.bulk_create(
+        objects, batch_size=max(min(batch_size, limit), 1)
+    )
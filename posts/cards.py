@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+CARD_KEY = "posts:card:{}:{}:{}:{}:{}"
+ACTIONS_MARKER = "<!-- actions -->"
+
+
+class Card:
+    """
+    Карточка записи: общий для всех читателей HTML до и после кнопок
+    и адреса для кнопок, которые зависят от пользователя.
+    """
+
+    def __init__(self, post, head, tail, url, edit_url):
+        self.post = post
+        self.head = mark_safe(head)
+        self.tail = mark_safe(tail)
+        self.url = url
+        self.edit_url = edit_url
+
+
+def card_key(post):
+    """
+    Ключ меняется при сохранении записи (поле updated), при изменении
+    числа комментариев, которое обновляется без save(), при удалении
+    группы, которое обнуляет group_id без save(), и при смене имени
+    автора, которое выводится в карточке и входит в её ссылки.
+    """
+    return CARD_KEY.format(post.id, post.updated.timestamp(),
+                           post.comment_count, post.group_id,
+                           post.author.username)
+
+
+def _render(post):
+    html = render_to_string("posts/includes/post_card.html", {"post": post})
+    head, _, tail = html.partition(ACTIONS_MARKER)
+    kwargs = {"username": post.author.username, "post_id": post.id}
+    return {
+        "head": head,
+        "tail": tail,
+        "url": reverse("post", kwargs=kwargs),
+        "edit_url": reverse("post_edit", kwargs=kwargs),
+    }
+
+
+def cards(posts):
+    """Карточки для записей страницы одним get_many из кэша."""
+    posts = list(posts)
+    keys = {post.id: card_key(post) for post in posts}
+    found = cache.get_many(list(keys.values()))
+    missing = {}
+    result = []
+    for post in posts:
+        key = keys[post.id]
+        if key not in found:
+            found[key] = missing[key] = _render(post)
+        result.append(Card(post, **found[key]))
+    if missing:
+        cache.set_many(missing, settings.POSTS_CARD_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,128 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (Comment, Follow, Group, GroupStats, Post, User,
+                     UserStats)
+
+
+def _adjust(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gt": 0})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def adjust_user(user_id, **deltas):
+    """
+    Меняет счётчики пользователя на заданные величины. Если строки со
+    статистикой ещё нет, она создаётся пересчётом по исходным таблицам.
+    """
+    for field, delta in deltas.items():
+        updated = _adjust(UserStats.objects.filter(user_id=user_id),
+                          field, delta)
+        if not updated and delta > 0:
+            recount_user(user_id)
+            return
+
+
+def adjust_comments(post_id, delta):
+    _adjust(Post.objects.filter(pk=post_id), "comment_count", delta)
+
+
+def add_group_post(post):
+    """
+    Учитывает запись в статистике её группы. Запись становится последней,
+    только если она не старше уже сохранённой: перенос старой записи в
+    группу не поднимает группу в списке.
+    """
+    stats = GroupStats.objects.filter(group_id=post.group_id)
+    if not _adjust(stats, "post_count", 1):
+        recount_groups([post.group_id])
+        return
+    stats.filter(
+        Q(last_post_at__isnull=True) | Q(last_post_at__lte=post.pub_date)
+    ).update(last_post_at=post.pub_date, latest_post=post)
+
+
+def remove_group_post(group_id, post_id):
+    """
+    Убирает запись из статистики группы. При удалении записи ссылка
+    latest_post уже обнулена (SET_NULL), при переносе ещё указывает на
+    неё; в обоих случаях последняя запись ищется заново по индексу.
+    """
+    stats = GroupStats.objects.filter(group_id=group_id)
+    _adjust(stats, "post_count", -1)
+    _refresh_latest(stats.filter(
+        Q(latest_post__isnull=True) | Q(latest_post=post_id)
+    ))
+
+
+def _refresh_latest(queryset):
+    latest = Post.objects.filter(group=OuterRef("pk")).order_by(
+        "-pub_date", "-id"
+    )
+    return queryset.update(
+        latest_post=Subquery(latest.values("pk")[:1]),
+        last_post_at=Subquery(latest.values("pub_date")[:1]),
+    )
+
+
+def recount_groups(group_ids=None):
+    """
+    Пересчитывает статистику групп (всех или перечисленных) по таблице
+    записей, создавая недостающие строки.
+    """
+    missing = Group.objects.filter(stats__isnull=True)
+    stats = GroupStats.objects.all()
+    if group_ids is not None:
+        missing = missing.filter(pk__in=group_ids)
+        stats = stats.filter(group_id__in=group_ids)
+    GroupStats.objects.bulk_create(
+        [GroupStats(group_id=group_id)
+         for group_id in missing.values_list("pk", flat=True).iterator()],
+        ignore_conflicts=True,
+    )
+    stats.update(post_count=_count(Post, "group"))
+    return _refresh_latest(stats)
+
+
+def recount_user(user_id):
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "post_count": Post.objects.filter(author_id=user_id).count(),
+            "follower_count": Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            "following_count": Follow.objects.filter(
+                user_id=user_id
+            ).count(),
+        },
+    )
+    return stats
+
+
+def _count(model, field):
+    subquery = (model.objects.filter(**{field: OuterRef("pk")})
+                .order_by()
+                .values(field)
+                .annotate(total=Count("pk"))
+                .values("total"))
+    return Coalesce(Subquery(subquery), 0)
+
+
+def recount_all():
+    """Пересчитывает все счётчики несколькими запросами UPDATE."""
+    Post.objects.update(comment_count=_count(Comment, "post"))
+
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        "pk", flat=True
+    )
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in missing.iterator()],
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.update(
+        post_count=_count(Post, "author"),
+        follower_count=_count(Follow, "author"),
+        following_count=_count(Follow, "user"),
+    )
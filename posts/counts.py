@@ -0,0 +1,58 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+from . import generations, replicas
+
+COUNT_KEY = "posts:count:{}"
+REFRESH_LOCK_KEY = "posts:count:{}:refresh"
+
+_pending = threading.local()
+
+
+def _store(key, scopes, compute):
+    # Поколения снимаются до подсчёта: изменение во время COUNT оставит
+    # запись устаревшей, а не закрепит неверное число как точное.
+    current = generations.generations(*scopes)
+    value = compute()
+    cache.set(COUNT_KEY.format(key),
+              {"value": value, "generations": current},
+              replicas.cache_timeout(settings.POSTS_COUNT_CACHE_TIMEOUT))
+    return value
+
+
+def cached_count(scopes, compute):
+    """
+    Число строк для пагинатора ленты, привязанное к поколениям scopes.
+
+    Пока поколения не менялись, число точное и берётся из кэша. После
+    изменения небольшие числа пересчитываются сразу, а крупные отдаются
+    как оценка: точный пересчёт выполняется после отправки ответа, не чаще
+    раза в POSTS_COUNT_REFRESH_INTERVAL секунд.
+    """
+    key = "|".join(scopes)
+    entry = cache.get(COUNT_KEY.format(key))
+    if entry is not None and (
+        entry["generations"] == generations.generations(*scopes)
+    ):
+        return entry["value"]
+    if entry is None or entry["value"] < settings.POSTS_COUNT_ESTIMATE_FROM:
+        return _store(key, scopes, compute)
+
+    if cache.add(REFRESH_LOCK_KEY.format(key), True,
+                 settings.POSTS_COUNT_REFRESH_INTERVAL):
+        if not hasattr(_pending, "refresh"):
+            _pending.refresh = {}
+        _pending.refresh[key] = (scopes, compute)
+    return entry["value"]
+
+
+@receiver(request_finished)
+def refresh_counts(**kwargs):
+    pending = getattr(_pending, "refresh", None)
+    _pending.refresh = {}
+    for key, (scopes, compute) in (pending or {}).items():
+        _store(key, scopes, compute)
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from . import replicas
+from .bulk import batches
+from .models import Follow, User, UserStats
+
+FOLLOWEES_KEY = "posts:graph:followees:{}"
+FOLLOWERS_KEY = "posts:graph:followers:{}"
+
+
+def _timeout():
+    return replicas.cache_timeout(settings.POSTS_FOLLOW_GRAPH_TIMEOUT)
+
+
+def followees_key(user_id):
+    return FOLLOWEES_KEY.format(user_id)
+
+
+def load_followees(user_ids):
+    """
+    Множества id авторов, на которых подписаны пользователи, одним
+    запросом по индексу (user, author). Результат сразу кладётся в кэш.
+    """
+    sets = {user_id: set() for user_id in user_ids}
+    rows = Follow.objects.filter(user_id__in=sets).values_list(
+        "user_id", "author_id"
+    )
+    for user_id, author_id in rows:
+        sets[user_id].add(author_id)
+    frozen = {user_id: frozenset(ids) for user_id, ids in sets.items()}
+    cache.set_many({followees_key(user_id): ids
+                    for user_id, ids in frozen.items()}, _timeout())
+    return frozen
+
+
+def followees(user_id):
+    ids = cache.get(followees_key(user_id))
+    if ids is None:
+        ids = load_followees([user_id])[user_id]
+    return ids
+
+
+def follower_counts(author_ids):
+    """Число подписчиков авторов: кэш, промахи одним запросом к UserStats."""
+    keys = {FOLLOWERS_KEY.format(author_id): author_id
+            for author_id in author_ids}
+    counts = {keys[key]: value
+              for key, value in cache.get_many(list(keys)).items()}
+    missing = [author_id for author_id in keys.values()
+               if author_id not in counts]
+    if missing:
+        counts.update(load_follower_counts(missing))
+    return counts
+
+
+def load_follower_counts(author_ids):
+    stored = dict(UserStats.objects.filter(user_id__in=author_ids)
+                  .values_list("user_id", "follower_count"))
+    counts = {author_id: stored.get(author_id, 0) for author_id in author_ids}
+    cache.set_many({FOLLOWERS_KEY.format(author_id): count
+                    for author_id, count in counts.items()}, _timeout())
+    return counts
+
+
+def warm(chunk_size=500):
+    """
+    Загружает в кэш подписки и числа подписчиков всех пользователей,
+    по два запроса на пачку. Нужна после старта с пустым кэшем и после
+    массовой загрузки, которая обходит сигналы.
+    """
+    user_ids = User.objects.order_by("pk").values_list("pk", flat=True)
+    total = 0
+    for chunk in batches(user_ids.iterator(chunk_size=chunk_size),
+                         chunk_size):
+        load_followees(chunk)
+        load_follower_counts(chunk)
+        total += len(chunk)
+    return total
+
+
+def follow_changed(user_id, author_id):
+    """
+    Вызывается сигналами Follow после фиксации транзакции. Множество
+    подписчика и счётчик автора сбрасываются, а не правятся: повторный
+    вызов ничего не меняет, а следующий запрос прочитает из базы уже
+    зафиксированные строки.
+    """
+    cache.delete_many([followees_key(user_id),
+                       FOLLOWERS_KEY.format(author_id)])
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import replicas
+
+GENERATION_KEY = "posts:generation:{}"
+
+
+def _initial():
+    # Новое значение после вытеснения ключа не совпадёт ни с одним из
+    # прежних, поэтому старые фрагменты не оживут.
+    return int(time.time() * 1000)
+
+
+def generations(*scopes):
+    """
+    Текущие номера поколений для областей вида "index", "group:<id>",
+    "author:<id>", "follow:<user_id>" в том же порядке.
+    """
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    for scope in set(scopes):
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial(), None)
+
+
+def post_scopes(author_id, group_id):
+    scopes = ["index", f"author:{author_id}"]
+    if group_id is not None:
+        scopes.append(f"group:{group_id}")
+    return scopes
+
+
+def fragment_context(*scopes):
+    """
+    Контекст для {% cache %} ленты: ключ меняется при любом изменении
+    записей в перечисленных областях, поэтому хранить фрагмент можно долго.
+    """
+    return {
+        "cache_version": ".".join(map(str, generations(*scopes))),
+        "cache_timeout": replicas.cache_timeout(
+            settings.POSTS_FRAGMENT_CACHE_TIMEOUT
+        ),
+    }
@@ -0,0 +1,108 @@
+import json
+import platform
+from io import StringIO
+
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет основные страницы на тестовой базе, наполненной '
+            'seed_data, для нескольких объёмов данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[1000, 10000],
+                            help='Число записей в каждом прогоне.')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Замерять без кэша (DummyCache).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+        parser.add_argument('--baseline',
+                            help='JSON прошлого прогона для сравнения.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимый рост p95 (доля).')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            results = {
+                str(size): self.run_size(size, options)
+                for size in options['sizes']
+            }
+        finally:
+            teardown_test_environment()
+
+        self.print_table(results)
+        report = {
+            'meta': {
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'cache': not options['no_cache'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = benchmark.compare(
+                    results, json.load(baseline)['results'],
+                    options['tolerance'],
+                )
+            if regressions:
+                raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_size(self, size, options):
+        """Отдельная тестовая база на каждый объём, рабочая не трогается."""
+        self.stdout.write(f'Объём {size} записей...')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            users = max(size // 20, 10)
+            call_command('seed_data', users=users,
+                         groups=max(size // 1000, 3), posts=size,
+                         comments=size * 2, follows=users * 10,
+                         seed=options['seed'], stdout=StringIO())
+            cache.clear()
+            caches = NO_CACHE if options['no_cache'] else None
+            with override_settings(POSTS_PAGE_CACHE_TIMEOUT=0,
+                                   POSTS_THROTTLE_RATES={},
+                                   **({'CACHES': caches} if caches else {})):
+                return benchmark.run(Client(), options['iterations'],
+                                     options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def print_table(self, results):
+        self.stdout.write(
+            f'{"объём":>8} {"страница":<14} {"p50":>8} {"p95":>8} '
+            f'{"p99":>8} {"SQL":>5} {"SQL мс":>8} {"шаблон мс":>10}'
+        )
+        for size, views in results.items():
+            for view, metrics in views.items():
+                self.stdout.write(
+                    f'{size:>8} {view:<14} {metrics["p50_ms"]:>8} '
+                    f'{metrics["p95_ms"]:>8} {metrics["p99_ms"]:>8} '
+                    f'{metrics["queries"]:>5} {metrics["sql_ms"]:>8} '
+                    f'{metrics["template_ms"]:>10}'
+                )
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+# Настройки SQLite по умолчанию (журнал DELETE, synchronous=FULL) против
+# POSTS_SQLITE_PRAGMAS.
+PROFILES = ('default', 'tuned')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает одновременную запись и чтение на файловой базе '
+            'SQLite без PRAGMA и с POSTS_SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда поддерживается только для SQLite.')
+        directory = tempfile.mkdtemp()
+        try:
+            results = {
+                profile: self.run_profile(profile, directory, options)
+                for profile in PROFILES
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        self.stdout.write(
+            f'{"профиль":<8} {"запись/с":>9} {"чтение/с":>9} '
+            f'{"p95 записи":>11} {"p95 чтения":>11} {"ошибки":>7}'
+        )
+        for profile, metrics in results.items():
+            self.stdout.write(
+                f'{profile:<8} {metrics["writes_per_s"]:>9} '
+                f'{metrics["reads_per_s"]:>9} '
+                f'{str(metrics["writes_p95_ms"]):>11} '
+                f'{str(metrics["reads_p95_ms"]):>11} '
+                f'{metrics["errors"]:>7}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+
+    def run_profile(self, profile, directory, options):
+        """
+        Отдельный файл базы на каждый профиль: режим WAL сохраняется в
+        файле и исказил бы замер без PRAGMA.
+        """
+        self.stdout.write(f'Профиль {profile}...')
+        pragmas = settings.POSTS_SQLITE_PRAGMAS if profile == 'tuned' else {}
+        test_settings = connection.settings_dict['TEST']
+        old_name = connection.settings_dict['NAME']
+        old_test_name = test_settings.get('NAME')
+        test_settings['NAME'] = os.path.join(directory, f'{profile}.sqlite3')
+        try:
+            with override_settings(POSTS_SQLITE_PRAGMAS=pragmas):
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                try:
+                    call_command('seed_data', users=50, groups=5,
+                                 posts=options['posts'],
+                                 comments=options['posts'], follows=500,
+                                 seed=options['seed'], stdout=StringIO())
+                    cache.clear()
+                    return benchmark.contention(
+                        options['writers'], options['readers'],
+                        options['seconds'], options['seed'],
+                    )
+                finally:
+                    connection.creation.destroy_test_db(old_name,
+                                                        verbosity=0)
+        finally:
+            test_settings['NAME'] = old_test_name
@@ -0,0 +1,221 @@
+import json
+import sys
+import time
+from collections import Counter
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import author_stats, generations, timeline
+from posts.bulk import (batches, bulk_insert, explicit_dates, next_id,
+                        returns_ids)
+from posts.counters import adjust_user, recount_groups
+from posts.models import Comment, Group, Post, User
+
+# SQLite ограничивает число параметров запроса.
+LOOKUP_BATCH = 500
+# Сколько ошибок разбора показывать, остальные только считаются.
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает записи с комментариями из файла JSONL. '
+            'Строка: {"author": "имя", "text": "...", "group": "slug", '
+            '"pub_date": "ISO 8601", "image": "posts/файл", '
+            '"comments": [{"author": "имя", "text": "...", '
+            '"created": "ISO 8601"}]}.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSONL или «-» для stdin.')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Строк на одну транзакцию.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Строк на один INSERT.')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Создавать неизвестных авторов.')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.create_users = options['create_users']
+        # Отображения имя -> id растут с числом разных авторов и групп,
+        # а не с размером файла.
+        self.users = {}
+        self.groups = {}
+        self.scopes = set()
+        self.totals = Counter()
+        self.errors = 0
+
+        if options['path'] == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(options['path'], encoding='utf-8')
+            except OSError as error:
+                raise CommandError(error)
+
+        started = time.monotonic()
+        with stream:
+            for chunk in batches(enumerate(stream, 1),
+                                 options['chunk_size']):
+                rows = [row for row in map(self.parse, chunk) if row]
+                with transaction.atomic():
+                    self.import_rows(rows)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Записей: {self.totals["posts"]}, комментариев: '
+                    f'{self.totals["comments"]}, '
+                    f'{self.totals["posts"] / max(elapsed, 1e-6):.0f} '
+                    f'записей/с'
+                )
+
+        generations.bump(*self.scopes)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {self.totals["posts"]}, комментариев: '
+            f'{self.totals["comments"]}, пропущено строк: {self.errors}, '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
+
+    def error(self, number, message):
+        self.errors += 1
+        if self.errors <= MAX_REPORTED_ERRORS:
+            self.stderr.write(f'Строка {number}: {message}')
+
+    def parse(self, numbered_line):
+        number, line = numbered_line
+        if not line.strip():
+            return None
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            self.error(number, f'неверный JSON ({error})')
+            return None
+        if not isinstance(row, dict) or not row.get('author') \
+                or not row.get('text'):
+            self.error(number, 'нужны поля author и text')
+            return None
+        comments = row.get('comments') or []
+        if not all(isinstance(comment, dict) and comment.get('author')
+                   and comment.get('text') for comment in comments):
+            self.error(number, 'у комментария нужны поля author и text')
+            return None
+        try:
+            row['pub_date'] = self.parse_date(row.get('pub_date'))
+            for comment in comments:
+                comment['created'] = self.parse_date(comment.get('created'))
+        except ValueError as error:
+            self.error(number, f'неверная дата ({error})')
+            return None
+        row['comments'] = comments
+        row['number'] = number
+        return row
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return timezone.now()
+        date = parse_datetime(value)
+        if date is None:
+            raise ValueError(value)
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        return date
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        for batch in batches(sorted(missing), LOOKUP_BATCH):
+            self.users.update(User.objects.filter(
+                username__in=batch
+            ).values_list('username', 'pk'))
+        missing -= self.users.keys()
+        if missing and self.create_users:
+            password = make_password(None)
+            bulk_insert(User, [User(username=name, password=password)
+                               for name in sorted(missing)],
+                        self.batch_size)
+            for batch in batches(sorted(missing), LOOKUP_BATCH):
+                self.users.update(User.objects.filter(
+                    username__in=batch
+                ).values_list('username', 'pk'))
+
+    def resolve_groups(self, slugs):
+        missing = set(slugs) - self.groups.keys()
+        for batch in batches(sorted(missing), LOOKUP_BATCH):
+            self.groups.update(Group.objects.filter(
+                slug__in=batch
+            ).values_list('slug', 'pk'))
+
+    def known(self, row):
+        authors = [row['author']] + [comment['author']
+                                     for comment in row['comments']]
+        unknown = [name for name in authors if name not in self.users]
+        if unknown:
+            self.error(row['number'], f'нет пользователя {unknown[0]}')
+            return False
+        if row.get('group') and row['group'] not in self.groups:
+            self.error(row['number'], f'нет группы {row["group"]}')
+            return False
+        return True
+
+    def import_rows(self, rows):
+        self.resolve_users(
+            {row['author'] for row in rows}
+            | {comment['author'] for row in rows
+               for comment in row['comments']}
+        )
+        self.resolve_groups({row['group'] for row in rows
+                             if row.get('group')})
+        rows = [row for row in rows if self.known(row)]
+        if not rows:
+            return
+
+        posts = [
+            Post(author_id=self.users[row['author']],
+                 group_id=self.groups.get(row.get('group')),
+                 text=row['text'], image=row.get('image') or None,
+                 pub_date=row['pub_date'],
+                 comment_count=len(row['comments']))
+            for row in rows
+        ]
+        for post in posts:
+            post.render_text()
+        # SQLite не возвращает id из bulk_create, поэтому они выдаются
+        # заранее внутри транзакции пачки.
+        if not returns_ids(Post):
+            start = next_id(Post)
+            for offset, post in enumerate(posts):
+                post.pk = start + offset
+        with explicit_dates(Post, 'pub_date'):
+            posts = bulk_insert(Post, posts, self.batch_size)
+
+        comments = [
+            Comment(post_id=post.pk, author_id=self.users[comment['author']],
+                    text=comment['text'], created=comment['created'])
+            for post, row in zip(posts, rows)
+            for comment in row['comments']
+        ]
+        for comment in comments:
+            comment.render_text()
+        with explicit_dates(Comment, 'created'):
+            bulk_insert(Comment, comments, self.batch_size)
+
+        # Сигналы bulk_create не вызываются: счётчики, ленты подписок и
+        # поколения кэша обновляются здесь.
+        authors = Counter(post.author_id for post in posts)
+        for author_id, count in authors.items():
+            adjust_user(author_id, post_count=count)
+        transaction.on_commit(partial(author_stats.forget, *authors))
+        groups = {post.group_id for post in posts} - {None}
+        if groups:
+            recount_groups(groups)
+        ids = [post.pk for post in posts]
+        timeline.fan_out_range(min(ids), max(ids))
+        for post in posts:
+            self.scopes.update(generations.post_scopes(post.author_id,
+                                                       post.group_id))
+
+        self.totals['posts'] += len(posts)
+        self.totals['comments'] += len(comments)
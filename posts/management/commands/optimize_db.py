@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts.sqlite import optimize
+
+
+class Command(BaseCommand):
+    help = ('Обслуживание базы SQLite: обновляет статистику планировщика '
+            'и сбрасывает журнал WAL. Запускается периодически, например '
+            'раз в час из cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--full', action='store_true',
+                            help='Полный ANALYZE вместо PRAGMA optimize.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда поддерживается только для SQLite.')
+        for statement in optimize(connection, full=options['full']):
+            self.stdout.write(statement)
+        self.stdout.write(self.style.SUCCESS('Обслуживание завершено'))
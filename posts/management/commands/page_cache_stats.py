@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.management.shared_cache import require_shared_cache
+from posts.middleware import page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша страниц для анонимов.'
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        stats = page_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {ratio:.1%}'
+        )
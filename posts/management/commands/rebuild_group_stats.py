@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import generations
+from posts.counters import recount_groups
+from posts.management.shared_cache import warn_unless_shared_cache
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает число записей и последнюю запись каждой группы '
+            'по таблице записей.')
+
+    def handle(self, *args, **options):
+        warn_unless_shared_cache(self)
+        groups = recount_groups()
+        generations.bump('groups')
+        self.stdout.write(self.style.SUCCESS(
+            f'Статистика групп пересчитана, групп: {groups}'
+        ))
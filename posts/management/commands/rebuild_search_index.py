@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс записей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000,
+                            help='Размер диапазона id на один INSERT.')
+        parser.add_argument('--no-optimize', action='store_true',
+                            help='Не объединять сегменты индекса в конце.')
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError('Полнотекстовый индекс доступен только '
+                               'для SQLite.')
+        table = search.TABLE
+        batch_size = options['batch_size']
+        last_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+
+        # Одна транзакция: правка записи посреди перестройки не должна
+        # удалять из индекса ещё не добавленную строку.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('delete-all')"
+            )
+            for start in range(0, last_id, batch_size):
+                cursor.execute(
+                    f"INSERT INTO {table}(rowid, text) "
+                    f"SELECT id, {search.NORMALIZED_TEXT.format('text')} "
+                    f"FROM posts_post WHERE id > %s AND id <= %s",
+                    [start, start + batch_size],
+                )
+                self.stdout.write(f'Проиндексировано до id '
+                                  f'{min(start + batch_size, last_id)}')
+            if not options['no_optimize']:
+                cursor.execute(
+                    f"INSERT INTO {table}({table}) VALUES ('optimize')"
+                )
+        search.ensure_triggers()
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import author_stats, follow_graph
+from posts.counters import recount_all
+from posts.management.shared_cache import warn_unless_shared_cache
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики комментариев, записей и подписок '
+            'по исходным таблицам.')
+
+    def handle(self, *args, **options):
+        warn_unless_shared_cache(self)
+        users = recount_all()
+        author_stats.forget_all()
+        follow_graph.warm()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны, пользователей: {users}'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Заполняет готовый HTML и выдержки записей и комментариев, '
+            'загруженных в обход save().')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--all', action='store_true',
+                            help='Пересчитать все строки, а не только '
+                                 'пустые (после изменения правил).')
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            done = self.render(model, options['batch_size'], options['all'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {done}')
+        self.stdout.write(self.style.SUCCESS('Тексты подготовлены'))
+
+    def render(self, model, batch_size, everything):
+        """
+        Пачки по id: bulk_update не трогает поле updated, поэтому ключи
+        кэша карточек не меняются, а HTML в них и так совпадает.
+        """
+        rows = model.objects.order_by('pk')
+        if not everything:
+            rows = rows.filter(text_html='')
+        last_id, done = 0, 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_id)
+                         .only('pk', 'text')[:batch_size])
+            if not batch:
+                return done
+            for item in batch:
+                item.render_text()
+            with transaction.atomic():
+                model.objects.bulk_update(batch, ['text_html', 'excerpt'])
+            last_id = batch[-1].pk
+            done += len(batch)
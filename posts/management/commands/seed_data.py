@@ -0,0 +1,228 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts import author_stats, follow_graph, generations, timeline
+from posts.bulk import batches, bulk_insert, explicit_dates, next_id
+from posts.counters import recount_all, recount_groups
+from posts.models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'утро', 'город', 'река', 'лес', 'дорога', 'кофе', 'книга', 'музыка',
+    'поезд', 'снег', 'море', 'друг', 'работа', 'вечер', 'солнце', 'дождь',
+    'прогулка', 'кино', 'парк', 'мост', 'туман', 'ветер', 'чай', 'сад',
+    'новый', 'старый', 'тихий', 'яркий', 'долгий', 'первый', 'последний',
+    'гулять', 'читать', 'думать', 'ехать', 'писать', 'смотреть', 'ждать',
+)
+
+# Доля записей вне групп.
+NO_GROUP_SHARE = 0.3
+
+
+def _cum_weights(size, skew):
+    """Накопленные веса закона Ципфа: первый ранг самый популярный."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу большим объёмом правдоподобных данных: '
+            'пользователи, группы, записи, комментарии и подписки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--images', type=float, default=0,
+                            help='Доля записей с изображением (0..1).')
+        parser.add_argument('--image-variants', type=int, default=10,
+                            help='Сколько разных изображений сгенерировать.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить записи.')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель степени для распределений '
+                                 'подписчиков, активности и групп.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            groups = self.create_groups(options['groups'])
+            # Популярность не зависит от порядка создания.
+            self.rng.shuffle(users)
+            self.rng.shuffle(groups)
+            self.create_follows(users, options['follows'])
+            post_ids, post_dates = self.create_posts(
+                users, groups, options['posts'], options['days'],
+                self.create_images(options['images'],
+                                   options['image_variants']),
+                options['images'],
+            )
+            self.create_comments(users, post_ids, post_dates,
+                                 options['comments'])
+
+            self.stdout.write('Пересчёт счётчиков...')
+            recount_all()
+            recount_groups()
+            self.stdout.write('Раскладка лент подписок...')
+            entries = timeline.rebuild()
+        generations.bump('index', 'groups')
+        author_stats.forget_all()
+        follow_graph.warm()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, записей в лентах подписок: {entries}'
+        ))
+
+    def bulk(self, model, objects):
+        started = time.monotonic()
+        total = 0
+        for batch in batches(objects, self.batch_size):
+            bulk_insert(model, batch, self.batch_size)
+            total += len(batch)
+        self.stdout.write(f'{model.__name__}: {total} '
+                          f'за {time.monotonic() - started:.1f} с')
+
+    def create_users(self, count):
+        start = next_id(User)
+        # Хеш считается один раз: пароль всё равно непригоден для входа.
+        password = make_password(None)
+        self.bulk(User, (
+            User(pk=pk, username=f'seed_user_{pk}', password=password,
+                 first_name=self.rng.choice(WORDS).capitalize())
+            for pk in range(start, start + count)
+        ))
+        return list(range(start, start + count))
+
+    def create_groups(self, count):
+        start = next_id(Group)
+        self.bulk(Group, (
+            Group(pk=pk, title=f'Группа {pk}', slug=f'seed-group-{pk}',
+                  description=self.sentence(5, 20))
+            for pk in range(start, start + count)
+        ))
+        return list(range(start, start + count))
+
+    def create_follows(self, users, count):
+        """
+        Авторы выбираются по закону Ципфа, поэтому число подписчиков
+        распределено степенным образом: немногие авторы собирают
+        большинство подписок.
+        """
+        if len(users) < 2:
+            return
+        count = min(count, len(users) * (len(users) - 1))
+        weights = _cum_weights(len(users), self.skew)
+        pairs = set()
+        while len(pairs) < count:
+            authors = self.rng.choices(users, cum_weights=weights,
+                                       k=count - len(pairs))
+            for author in authors:
+                user = self.rng.choice(users)
+                if user != author:
+                    pairs.add((user, author))
+        self.bulk(Follow, (
+            Follow(user_id=user, author_id=author)
+            for user, author in pairs
+        ))
+
+    def create_images(self, share, variants):
+        """Несколько крупных изображений, общих для всех записей."""
+        if share <= 0 or variants <= 0:
+            return []
+        names = []
+        for number in range(variants):
+            image = Image.new('RGB', (1200, 800), tuple(
+                self.rng.randrange(256) for _ in range(3)
+            ))
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=85)
+            names.append(default_storage.save(
+                f'posts/seed_{number}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def create_posts(self, users, groups, count, days, images, image_share):
+        """
+        Даты записей равномерно распределены за последние days дней и
+        возрастают вместе с id, как при обычной публикации.
+        """
+        start = next_id(Post)
+        span = timedelta(days=days).total_seconds()
+        dates = sorted(self.now - timedelta(seconds=self.rng.random() * span)
+                       for _ in range(count))
+        # Активность авторов не связана с числом их подписчиков.
+        writers = self.rng.sample(users, len(users))
+        authors = self.rng.choices(
+            writers, cum_weights=_cum_weights(len(users), self.skew), k=count
+        )
+        group_weights = _cum_weights(len(groups), self.skew)
+
+        def posts():
+            for offset, (author, date) in enumerate(zip(authors, dates)):
+                group = None
+                if groups and self.rng.random() >= NO_GROUP_SHARE:
+                    group = self.rng.choices(groups,
+                                             cum_weights=group_weights)[0]
+                image = None
+                if images and self.rng.random() < image_share:
+                    image = self.rng.choice(images)
+                post = Post(pk=start + offset, author_id=author,
+                            group_id=group, image=image, pub_date=date,
+                            text=self.sentence(5, 60))
+                post.render_text()
+                yield post
+
+        with explicit_dates(Post, 'pub_date'):
+            self.bulk(Post, posts())
+        return range(start, start + count), dates
+
+    def create_comments(self, users, post_ids, post_dates, count):
+        """Свежие записи комментируют чаще: вес падает с возрастом."""
+        if not post_ids:
+            return
+        ranks = self.rng.choices(
+            range(len(post_ids)),
+            cum_weights=_cum_weights(len(post_ids), self.skew / 2),
+            k=count,
+        )
+
+        def comments():
+            for rank in ranks:
+                offset = len(post_ids) - 1 - rank
+                created = min(
+                    post_dates[offset]
+                    + timedelta(hours=self.rng.expovariate(1 / 12)),
+                    self.now,
+                )
+                comment = Comment(post_id=post_ids[offset],
+                                  author_id=self.rng.choice(users),
+                                  text=self.sentence(2, 25),
+                                  created=created)
+                comment.render_text()
+                yield comment
+
+        with explicit_dates(Comment, 'created'):
+            self.bulk(Comment, comments())
+
+    def sentence(self, shortest, longest):
+        words = self.rng.choices(WORDS, k=self.rng.randint(shortest, longest))
+        return ' '.join(words).capitalize() + '.'
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts.replicas import copy_database
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик.'
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копирование поддерживается только для '
+                               'SQLite; настройте репликацию СУБД.')
+        if not settings.POSTS_READ_REPLICAS:
+            raise CommandError('POSTS_READ_REPLICAS пуст.')
+        for alias in settings.POSTS_READ_REPLICAS:
+            target = connections[alias].settings_dict['NAME']
+            copy_database(source.settings_dict['NAME'], target)
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: скопировано в {target}'
+            ))
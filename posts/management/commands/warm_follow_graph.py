@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import follow_graph
+from posts.management.shared_cache import require_shared_cache
+
+
+class Command(BaseCommand):
+    help = ('Загружает в кэш подписки и числа подписчиков всех '
+            'пользователей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Пользователей на один запрос.')
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        users = follow_graph.warm(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Граф подписок загружен, пользователей: {users}'
+        ))
@@ -0,0 +1,59 @@
+import os
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _warm(name):
+    try:
+        thumbnails.generate(name)
+    except Exception as error:
+        return name, str(error)
+    return name, None
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры для всех изображений записей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов (по умолчанию по числу '
+                                 'ядер).')
+        parser.add_argument('--chunk-size', type=int, default=16,
+                            help='Сколько изображений отдавать процессу '
+                                 'за раз.')
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='').exclude(image__isnull=True)
+                 .order_by('image')
+                 .values_list('image', flat=True)
+                 .distinct())
+        workers = max(options['workers'] or 1, 1)
+
+        if workers == 1:
+            results = map(_warm, names.iterator())
+            self._report(results)
+            return
+
+        names = list(names)
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        with Pool(workers) as pool:
+            self._report(pool.imap_unordered(_warm, names,
+                                             options['chunk_size']))
+
+    def _report(self, results):
+        done = failed = 0
+        for name, error in results:
+            if error is None:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюр построено: {done}, ошибок: {failed}'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.management.shared_cache import require_shared_cache
+from posts.writes import write_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает число записей, повторов, отказов и время ожидания.'
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        stats = write_stats()
+        done = stats['writes'] + stats['failures']
+        average = stats['wait_ms'] / done if done else 0
+        self.stdout.write(
+            f'Записей: {stats["writes"]}, повторов: {stats["retries"]}, '
+            f'отказов: {stats["failures"]}, '
+            f'среднее ожидание: {average:.1f} мс'
+        )
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import CommandError
+
+MESSAGE = ('Кэш по умолчанию (LocMemCache) у каждого процесса свой, и '
+           'команда не видит кэш веб-процессов. Задайте YATUBE_CACHE_DIR, '
+           'чтобы кэш был общим.')
+
+
+def require_shared_cache():
+    """Для команд, которые только читают или заполняют кэш."""
+    if not settings.SHARED_CACHE:
+        raise CommandError(MESSAGE)
+
+
+def warn_unless_shared_cache(command):
+    """Для команд, которые меняют базу и заодно сбрасывают кэш."""
+    if not settings.SHARED_CACHE:
+        command.stderr.write(command.style.WARNING(MESSAGE))
@@ -0,0 +1,195 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import generations, replicas, throttling, writes
+
+PAGE_KEY = "posts:page:{}"
+PIN_COOKIE = "pin_primary"
+HITS_KEY = "posts:page_cache:hits"
+MISSES_KEY = "posts:page_cache:misses"
+
+
+def tag_response(request, *scopes):
+    """
+    Помечает ответ суррогатными ключами (областями поколений). Версии
+    снимаются до выборки данных, поэтому изменение, случившееся во время
+    отрисовки, не закрепит в кэше устаревшую страницу.
+    """
+    request.surrogate_keys = dict(
+        zip(scopes, generations.generations(*scopes))
+    )
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def page_cache_stats():
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        "hits": counters.get(HITS_KEY, 0),
+        "misses": counters.get(MISSES_KEY, 0),
+    }
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Кэширует целиком страницы, отданные анонимным посетителям.
+
+    Кэшируются только ответы представлений, вызвавших tag_response().
+    Запись считается свежей, пока не изменилось ни одно из поколений, на
+    которые она ссылается; сигналы в posts.signals повышают поколения при
+    изменении записей, комментариев, групп и подписок.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._cacheable_request(request):
+            return self.get_response(request)
+
+        key = PAGE_KEY.format(
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        )
+        entry = cache.get(key)
+        if entry is not None and self._fresh(entry):
+            _count(HITS_KEY)
+            response = HttpResponse(entry["content"],
+                                    status=entry["status"],
+                                    content_type=entry["content_type"])
+            response["Surrogate-Key"] = " ".join(entry["keys"])
+            response["X-Cache"] = "HIT"
+            return response
+
+        _count(MISSES_KEY)
+        response = self.get_response(request)
+        keys = getattr(request, "surrogate_keys", None)
+        if keys and self._cacheable_response(request, response):
+            cache.set(key, {
+                "content": response.content,
+                "status": response.status_code,
+                "content_type": response["Content-Type"],
+                "keys": keys,
+            }, replicas.cache_timeout(settings.POSTS_PAGE_CACHE_TIMEOUT))
+            response["Surrogate-Key"] = " ".join(keys)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def _cacheable_request(self, request):
+        return (
+            settings.POSTS_PAGE_CACHE_TIMEOUT
+            and request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+        )
+
+    def _cacheable_response(self, request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.user.is_authenticated
+        )
+
+    def _fresh(self, entry):
+        scopes = list(entry["keys"])
+        return generations.generations(*scopes) == [
+            entry["keys"][scope] for scope in scopes
+        ]
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик для представлений из POSTS_REPLICA_VIEWS.
+
+    После любого изменяющего запроса, а также GET, который писал через
+    posts.writes.run() (profile_follow, profile_unfollow), клиент
+    получает куку, и следующие POSTS_PRIMARY_PIN_SECONDS секунд все его
+    запросы читают из основной базы: страница после редиректа покажет
+    только что сохранённые данные, даже если реплика ещё отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = set(settings.POSTS_REPLICA_VIEWS)
+
+    def __call__(self, request):
+        writes.reset_wait()
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.use_replicas(False)
+        wrote = (request.method not in ("GET", "HEAD", "OPTIONS")
+                 or writes.waited_ms() is not None)
+        if settings.POSTS_READ_REPLICAS and wrote:
+            response.set_cookie(PIN_COOKIE, "1",
+                                max_age=settings.POSTS_PRIMARY_PIN_SECONDS,
+                                httponly=True, samesite="Lax")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = f"{view_func.__module__}.{view_func.__name__}"
+        replicas.use_replicas(
+            request.method in ("GET", "HEAD")
+            and name in self.views
+            and PIN_COOKIE not in request.COOKIES
+        )
+
+
+class WriteTimingMiddleware:
+    """
+    Показывает в заголовке Server-Timing, сколько запрос ждал записи в
+    базу, а отказ posts.writes.run() по таймауту превращает в ответ 503
+    с Retry-After вместо ошибки 500.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes.reset_wait()
+        response = self.get_response(request)
+        waited = writes.waited_ms()
+        if waited is not None:
+            response["Server-Timing"] = f"db-write-wait;dur={waited:.1f}"
+        return response
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, writes.WriteBusy):
+            response = HttpResponse("База данных занята, повторите запрос.",
+                                    status=503,
+                                    content_type="text/plain; charset=utf-8")
+            response["Retry-After"] = str(settings.POSTS_WRITE_RETRY_AFTER)
+            return response
+
+
+class ThrottleMiddleware:
+    """
+    Ограничивает изменяющие запросы к представлениям из
+    POSTS_THROTTLED_VIEWS (полное имя представления -> корзина) для
+    представлений, на которые нельзя поставить декоратор throttle.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = dict(settings.POSTS_THROTTLED_VIEWS)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            return None
+        scope = self.views.get(
+            f"{view_func.__module__}.{view_func.__name__}"
+        )
+        if scope is None:
+            return None
+        return throttling.rejected(request, scope)
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+CREATE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts
+    USING fts5(text, content='', tokenize='unicode61 remove_diacritics 2')
+"""
+
+CREATE_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, text)
+        VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id,
+                replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id,
+                replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'));
+        INSERT INTO posts_post_fts(rowid, text)
+        VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'));
+    END
+    """,
+)
+
+FILL_TABLE = """
+    INSERT INTO posts_post_fts(rowid, text)
+    SELECT id, replace(replace(text, 'ё', 'е'), 'Ё', 'Е') FROM posts_post
+"""
+
+DROP = (
+    "DROP TRIGGER IF EXISTS posts_post_fts_insert",
+    "DROP TRIGGER IF EXISTS posts_post_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_post_fts_update",
+    "DROP TABLE IF EXISTS posts_post_fts",
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in (CREATE_TABLE, *CREATE_TRIGGERS, FILL_TABLE):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_auto_20261017_0406'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
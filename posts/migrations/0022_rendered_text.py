@@ -0,0 +1,59 @@
+# Generated by Django 2.2.6 on 2026-10-17 04:49
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 200
+BATCH_SIZE = 2000
+
+
+def render_texts(apps, schema_editor):
+    # Шаблоны читают только text_html: без заполнения старые строки
+    # остались бы пустыми.
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        rows = model.objects.order_by('pk').only('pk', 'text')
+        last_id = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_id)[:BATCH_SIZE])
+            if not batch:
+                break
+            for item in batch:
+                item.text_html = linebreaksbr(item.text, autoescape=True)
+                item.excerpt = Truncator(
+                    ' '.join(item.text.split())
+                ).chars(EXCERPT_LENGTH)
+            model.objects.bulk_update(batch, ['text_html', 'excerpt'])
+            last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Выдержка'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Выдержка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
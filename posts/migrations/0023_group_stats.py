@@ -0,0 +1,54 @@
+# Generated by Django 2.2.6 on 2026-10-17 04:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+
+    GroupStats.objects.bulk_create(
+        [GroupStats(group_id=group_id)
+         for group_id in Group.objects.values_list('pk', flat=True)],
+        batch_size=500,
+    )
+    posts = Post.objects.filter(group=OuterRef('pk')).order_by()
+    latest = posts.order_by('-pub_date', '-id')
+    GroupStats.objects.update(
+        post_count=Coalesce(Subquery(
+            posts.values('group').annotate(total=Count('pk')).values('total')
+        ), 0),
+        latest_post=Subquery(latest.values('pk')[:1]),
+        last_post_at=Subquery(latest.values('pub_date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя запись')),
+                ('latest_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post')),
+            ],
+            options={
+                'ordering': ['-last_post_at', '-group'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post_at', '-group'], name='group_stats_activity'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
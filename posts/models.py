@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from . import counts
 
 User = get_user_model()
 
@@ -19,10 +23,97 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    FEED_FIELDS = (
+        "text_html", "excerpt", "pub_date", "updated", "image",
+        "comment_count",
+        "author", "author__username", "author__first_name",
+        "author__last_name",
+        "group", "group__slug", "group__title",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count_hint = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._count_hint = self._count_hint
+        return clone
+
+    def for_feed(self, *fields):
+        """
+        Записи для карточек ленты: автор и группа одним JOIN. Исходный
+        текст не читается, карточке хватает готового HTML; fields
+        добавляют нужные вызывающему поля.
+        """
+        return self.select_related("author", "group").only(
+            *self.FEED_FIELDS, *fields
+        )
+
+    def with_count(self, value):
+        """Число записей уже известно из хранимого счётчика."""
+        clone = self._chain()
+        clone._count_hint = value
+        return clone
+
+    def with_cached_count(self, *scopes):
+        """
+        Число записей берётся из кэша, привязанного к поколениям scopes,
+        см. posts.counts. Вызывается последним: фильтры после него
+        изменили бы число.
+        """
+        clone = self._chain()
+        clone._count_hint = scopes
+        return clone
+
+    def count(self):
+        # Paginator.count вызывает этот метод, поэтому пагинаторы лент
+        # обходятся без COUNT(*) на каждом запросе.
+        hint = self._count_hint
+        if hint is None or self._result_cache is not None:
+            return super().count()
+        if isinstance(hint, int):
+            return hint
+        return counts.cached_count(hint, super().count)
+
+
+class RenderedText(models.Model):
+    """
+    Текст, заранее переведённый в HTML (экранирование и переносы строк
+    как у linebreaksbr), и короткая выдержка без разметки. Вычисляются
+    при сохранении; bulk_create обходит save(), поэтому массовая
+    загрузка вызывает render_text() сама.
+    """
+    EXCERPT_LENGTH = 200
+
+    text_html = models.TextField('Текст в HTML', default='', editable=False)
+    excerpt = models.CharField('Выдержка', max_length=EXCERPT_LENGTH,
+                               default='', editable=False)
+
+    class Meta:
+        abstract = True
+
+    def render_text(self):
+        self.text_html = linebreaksbr(self.text, autoescape=True)
+        self.excerpt = Truncator(" ".join(self.text.split())).chars(
+            self.EXCERPT_LENGTH
+        )
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "text_html",
+                                       "excerpt"}
+        super().save(*args, **kwargs)
+
+
+class Post(RenderedText):
     text = models.TextField(verbose_name='Текст записи',
                             help_text='Укажите текст Вашей записи.')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name="posts")
     group = models.ForeignKey(Group,
@@ -37,15 +128,28 @@ class Post(models.Model):
                               upload_to='posts/',
                               blank=True,
                               null=True)
+    comment_count = models.PositiveIntegerField('Количество комментариев',
+                                                default=0,
+                                                editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"],
+                         name="post_date"),
+            models.Index(fields=["author", "-pub_date", "-id"],
+                         name="post_author_date"),
+            models.Index(fields=["group", "-pub_date", "-id"],
+                         name="post_group_date"),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
-class Comment(models.Model):
+class Comment(RenderedText):
     post = models.ForeignKey(Post,
                              on_delete=models.CASCADE,
                              related_name='comments',)
@@ -56,6 +160,12 @@ class Comment(models.Model):
                             help_text='Ваш комментарий')
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "created"],
+                         name="comment_post_created"),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User,
@@ -70,6 +180,75 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=["user", "author"],
                                     name="unique_follow")
         ]
+        indexes = [
+            models.Index(fields=["author", "user"],
+                         name="follow_author_user"),
+        ]
 
     def __str__(self):
         return self.author.username
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name="feed_entries")
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name="feed_entries")
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"],
+                                    name="unique_feed_entry")
+        ]
+        indexes = [
+            models.Index(fields=["user", "-pub_date", "-post"],
+                         name="feed_entry_user_date"),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name="stats")
+    post_count = models.PositiveIntegerField('Записей', default=0)
+    follower_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    def __str__(self):
+        return str(self.user)
+
+
+class GroupStats(models.Model):
+    """
+    Число записей группы и её последняя запись. Обновляются сигналами при
+    создании, удалении и переносе записи между группами, пересчитываются
+    командой rebuild_group_stats.
+    """
+    group = models.OneToOneField(Group,
+                                 on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name="stats")
+    post_count = models.PositiveIntegerField('Записей', default=0)
+    last_post_at = models.DateTimeField('Последняя запись',
+                                        blank=True,
+                                        null=True)
+    latest_post = models.ForeignKey(Post,
+                                    on_delete=models.SET_NULL,
+                                    related_name="+",
+                                    blank=True,
+                                    null=True)
+
+    class Meta:
+        ordering = ['-last_post_at', '-group']
+        indexes = [
+            models.Index(fields=["-last_post_at", "-group"],
+                         name="group_stats_activity"),
+        ]
+
+    def __str__(self):
+        return str(self.group)
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property, lazy
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Возвращает список строковых значений или None для битого курсора."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list):
+        return None
+    return values
+
+
+class KeysetPage:
+    """
+    Страница курсорной навигации. Запрос выполняется при первом обращении,
+    поэтому страница, попавшая в закэшированный фрагмент, не стоит ничего.
+    """
+
+    is_keyset = True
+
+    def __init__(self, queryset, paginator, backwards, from_cursor):
+        self.queryset = queryset
+        self.paginator = paginator
+        self.backwards = backwards
+        self.from_cursor = from_cursor
+
+    def __repr__(self):
+        return "<KeysetPage of %s objects>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    @cached_property
+    def _state(self):
+        per_page = self.paginator.per_page
+        rows = list(self.queryset[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if self.backwards:
+            rows.reverse()
+            return rows, True, has_more
+        return rows, has_more, self.from_cursor
+
+    @property
+    def object_list(self):
+        return self._state[0]
+
+    def has_next(self):
+        return self._state[1]
+
+    def has_previous(self):
+        return self._state[2]
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not (self.has_next() and self.object_list):
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not (self.has_previous() and self.object_list):
+            return None
+        return self.paginator.cursor_for(self.object_list[0])
+
+
+class KeysetPaginator:
+    """
+    Постраничная навигация по курсору вместо OFFSET.
+
+    Курсор кодирует значения полей сортировки последней (или первой)
+    записи страницы, поэтому любая страница выбирается одним запросом
+    по индексу и без COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(
+            ordering
+            or object_list.query.order_by
+            or object_list.model._meta.ordering
+        )
+        self.fields = [name.lstrip("-") for name in self.ordering]
+
+    def cursor_for(self, obj):
+        return encode_cursor(getattr(obj, name) for name in self.fields)
+
+    def _parse(self, cursor):
+        values = decode_cursor(cursor)
+        if values is None or len(values) != len(self.fields):
+            return None
+        try:
+            return [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception:
+            return None
+
+    def _field(self, name):
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _seek(self, values, backwards):
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            descending = name.startswith("-")
+            lookup = "lt" if descending != backwards else "gt"
+            field = self.fields[position]
+            step = Q(**{f"{field}__{lookup}": values[position]})
+            for previous, value in zip(self.fields[:position], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _reverse_ordering(self):
+        return [
+            name[1:] if name.startswith("-") else f"-{name}"
+            for name in self.ordering
+        ]
+
+    def get_page(self, after=None, before=None):
+        """
+        Возвращает страницу после курсора ``after`` или перед ``before``.
+        Некорректный курсор приводит к первой странице, как get_page()
+        у стандартного Paginator.
+        """
+        after_values = self._parse(after)
+        before_values = self._parse(before) if after_values is None else None
+        queryset = self.object_list
+
+        if before_values is not None:
+            queryset = queryset.filter(
+                self._seek(before_values, True)
+            ).order_by(*self._reverse_ordering())
+            return KeysetPage(queryset, self, True, True)
+
+        if after_values is not None:
+            queryset = queryset.filter(self._seek(after_values, False))
+        return KeysetPage(queryset.order_by(*self.ordering), self, False,
+                          after_values is not None)
+
+
+def get_feed_page(request, queryset, per_page):
+    """
+    Страница ленты: курсорная, если в запросе есть ``after``/``before``,
+    иначе обычная нумерованная.
+    """
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+    if after or before:
+        paginator = KeysetPaginator(queryset, per_page)
+        return paginator, paginator.get_page(after=after, before=before)
+
+    paginator = Paginator(queryset, per_page)
+    page = paginator.get_page(request.GET.get("page"))
+    if page.has_next():
+        # Переход дальше уже идёт по курсору: глубокие страницы не
+        # требуют OFFSET. Курсор вычисляется лениво, только при отрисовке.
+        keyset = KeysetPaginator(queryset, per_page)
+        page.next_cursor = lazy(lambda: keyset.cursor_for(page[-1]), str)()
+    return paginator, page
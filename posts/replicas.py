@@ -0,0 +1,80 @@
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def replicas_enabled():
+    return getattr(_state, "enabled", False)
+
+
+def use_replicas(enabled):
+    _state.enabled = enabled
+
+
+def cache_timeout(timeout):
+    """
+    Срок хранения кэша для данных текущего запроса. Прочитанное с реплики
+    может отставать от поколений, уже повышенных записью в основную базу,
+    поэтому хранится не дольше окна отставания POSTS_PRIMARY_PIN_SECONDS.
+    """
+    if not (settings.POSTS_READ_REPLICAS and replicas_enabled()):
+        return timeout
+    if timeout is None:
+        return settings.POSTS_PRIMARY_PIN_SECONDS
+    return min(timeout, settings.POSTS_PRIMARY_PIN_SECONDS)
+
+
+@contextmanager
+def read_from_replicas():
+    previous = replicas_enabled()
+    use_replicas(True)
+    try:
+        yield
+    finally:
+        use_replicas(previous)
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение на реплики из POSTS_READ_REPLICAS, но только когда
+    это разрешено для текущего запроса (см. ReplicaRoutingMiddleware).
+    Запись всегда идёт в основную базу, даже для объектов, прочитанных
+    с реплики.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.POSTS_READ_REPLICAS
+        if replicas and replicas_enabled():
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.POSTS_READ_REPLICAS:
+            return False
+        return None
+
+
+def copy_database(source, target):
+    """
+    Копирует файл SQLite через backup API: снимок согласован даже при
+    одновременной записи в исходную базу.
+    """
+    source_connection = sqlite3.connect(source)
+    target_connection = sqlite3.connect(target)
+    try:
+        source_connection.backup(target_connection)
+    finally:
+        target_connection.close()
+        source_connection.close()
@@ -0,0 +1,156 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .pagination import decode_cursor, encode_cursor
+
+TABLE = "posts_post_fts"
+
+# Токенизатор unicode61 приводит кириллицу к нижнему регистру, но не
+# отождествляет «ё» и «е», поэтому текст нормализуется до индексации.
+NORMALIZED_TEXT = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {TABLE}(rowid, text)
+        VALUES (new.id, {NORMALIZED_TEXT.format("new.text")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, text)
+        VALUES ('delete', old.id, {NORMALIZED_TEXT.format("old.text")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, text)
+        VALUES ('delete', old.id, {NORMALIZED_TEXT.format("old.text")});
+        INSERT INTO {TABLE}(rowid, text)
+        VALUES (new.id, {NORMALIZED_TEXT.format("new.text")});
+    END
+    """,
+)
+
+# Упрощённый стеммер: отбрасывает самые частые окончания русских слов,
+# а поиск идёт по префиксу основы.
+ENDINGS = sorted((
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "ой",
+    "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ие", "ые", "ом", "ем", "ам",
+    "ям", "ах", "ях", "ов", "ев", "ую", "юю", "ть", "ся", "а", "я", "о",
+    "е", "ы", "и", "у", "ю", "ь", "й",
+), key=len, reverse=True)
+MIN_STEM = 3
+MAX_TERMS = 8
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def ensure_triggers(using=DEFAULT_DB_ALIAS):
+    """
+    Восстанавливает триггеры индекса. SQLite теряет их, когда миграция
+    пересоздаёт таблицу posts_post, поэтому вызывается после migrate.
+    """
+    target = connections[using]
+    if target.vendor != "sqlite":
+        return
+    if TABLE not in target.introspection.table_names():
+        return
+    with target.cursor() as cursor:
+        for statement in TRIGGERS:
+            cursor.execute(statement)
+
+
+def _stem(word):
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def build_query(text):
+    """
+    Превращает пользовательский запрос в выражение MATCH: все слова
+    обязательны, каждое ищется по префиксу своей основы.
+    """
+    words = re.findall(r"\w+", text.lower().replace("ё", "е"))
+    return " ".join(f'"{_stem(word)}"*' for word in words[:MAX_TERMS])
+
+
+def matching_ids(text):
+    """Подзапрос id записей, подходящих под запрос, для filter(pk__in=)."""
+    return RawSQL(
+        f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s",
+        [build_query(text)],
+    )
+
+
+class SearchPage:
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = None
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return False
+
+    def has_other_pages(self):
+        return self.has_next()
+
+
+def search(text, per_page, after=None):
+    """
+    Записи, отсортированные по релевантности (bm25), с курсорной
+    навигацией по паре (rank, id).
+    """
+    query = build_query(text)
+    if not query:
+        return SearchPage([], None)
+
+    sql = f"SELECT rowid, rank FROM {TABLE} WHERE {TABLE} MATCH %s"
+    params = [query]
+    cursor_values = decode_cursor(after)
+    if cursor_values and len(cursor_values) == 2:
+        try:
+            rank, last_id = float(cursor_values[0]), int(cursor_values[1])
+        except ValueError:
+            pass
+        else:
+            sql += " AND (rank > %s OR (rank = %s AND rowid > %s))"
+            params += [rank, rank, last_id]
+    sql += " ORDER BY rank, rowid LIMIT %s"
+    params.append(per_page + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last_id, last_rank = rows[-1]
+        next_cursor = encode_cursor((last_rank, last_id))
+    posts = Post.objects.for_feed().in_bulk([post_id for post_id, _ in rows])
+    return SearchPage(
+        [posts[post_id] for post_id, _ in rows if post_id in posts],
+        next_cursor,
+    )
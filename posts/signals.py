@@ -0,0 +1,160 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import (author_stats, counters, follow_graph, generations, search,
+               timeline)
+from .models import Comment, Follow, Group, GroupStats, Post
+
+
+def _after_commit(func, *args):
+    # Кэш сбрасывается после фиксации: читатель, попавший между сбросом
+    # и COMMIT, сохранил бы прежние строки под новым ключом.
+    transaction.on_commit(partial(func, *args))
+
+
+def _bump_post(post):
+    scopes = generations.post_scopes(post.author_id, post.group_id)
+    scopes.append(f"post:{post.pk}")
+    previous = getattr(post, "_previous_state", None)
+    if previous is not None:
+        scopes += generations.post_scopes(*previous)
+    _after_commit(generations.bump, *scopes)
+
+
+def _bump_comment(comment):
+    state = Post.objects.filter(pk=comment.post_id).values_list(
+        "author_id", "group_id"
+    ).first()
+    if state is not None:
+        _after_commit(generations.bump, f"post:{comment.post_id}",
+                      *generations.post_scopes(*state))
+
+
+def _bump_follow(follow):
+    # Лента подписчика и счётчики подписок в профилях обоих участников.
+    _after_commit(generations.bump, f"follow:{follow.user_id}",
+                  f"author:{follow.user_id}", f"author:{follow.author_id}")
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw, **kwargs):
+    # Автора и группу до изменения нужно знать, чтобы сбросить и
+    # прежние ленты.
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = Post.objects.filter(
+            pk=instance.pk
+        ).values_list("author_id", "group_id").first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_user(instance.author_id, post_count=1)
+        _after_commit(author_stats.forget, instance.author_id)
+        timeline.fan_out(instance)
+    _move_post(instance, created)
+    _bump_post(instance)
+
+
+def _move_post(post, created):
+    previous_group = None
+    if not created:
+        previous = getattr(post, "_previous_state", None)
+        if previous is None or previous[1] == post.group_id:
+            return
+        previous_group = previous[1]
+    if previous_group is not None:
+        counters.remove_group_post(previous_group, post.pk)
+    if post.group_id is not None:
+        counters.add_group_post(post)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.adjust_user(instance.author_id, post_count=-1)
+    _after_commit(author_stats.forget, instance.author_id)
+    if instance.group_id is not None:
+        counters.remove_group_post(instance.group_id, instance.pk)
+    _bump_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_comments(instance.post_id, 1)
+    _bump_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.adjust_comments(instance.post_id, -1)
+    _bump_comment(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    _after_commit(generations.bump, "groups", f"group:{instance.pk}")
+
+
+@receiver(post_save, sender=Group)
+def group_created(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, raw, **kwargs):
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = Group.objects.filter(
+            pk=instance.pk
+        ).values_list("title", "slug").first()
+
+
+@receiver(post_save, sender=Group)
+def group_touched(sender, instance, created, **kwargs):
+    # Карточки записей показывают название и адрес группы: новое значение
+    # updated меняет их ключи в posts.cards. Удаление группы меняет ключ
+    # через group_id, поэтому записи не трогаются.
+    previous = getattr(instance, "_previous_state", None)
+    if previous is not None and previous != (instance.title, instance.slug):
+        Post.objects.filter(group=instance).update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_user(instance.author_id, follower_count=1)
+        counters.adjust_user(instance.user_id, following_count=1)
+        _after_commit(author_stats.forget, instance.author_id,
+                      instance.user_id)
+        _after_commit(follow_graph.follow_changed, instance.user_id,
+                      instance.author_id)
+        timeline.backfill(instance.user_id, instance.author_id)
+        _bump_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.adjust_user(instance.author_id, follower_count=-1)
+    counters.adjust_user(instance.user_id, following_count=-1)
+    _after_commit(author_stats.forget, instance.author_id,
+                  instance.user_id)
+    _after_commit(follow_graph.follow_changed, instance.user_id,
+                  instance.author_id)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.follower_removed(instance.author_id)
+    _bump_follow(instance)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == "posts":
+        search.ensure_triggers(using)
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(connection, pragmas=None):
+    """
+    Выполняет PRAGMA из POSTS_SQLITE_PRAGMAS для нового соединения.
+    Режим журнала идёт первым: WAL сохраняется в файле базы, остальные
+    настройки действуют только в пределах соединения.
+    """
+    if pragmas is None:
+        pragmas = settings.POSTS_SQLITE_PRAGMAS
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def current_pragmas(connection, names):
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            values[name] = cursor.fetchone()[0]
+    return values
+
+
+def optimize(connection, full=False):
+    """
+    Обновляет статистику планировщика. PRAGMA optimize анализирует только
+    таблицы, где статистика устарела; full запускает полный ANALYZE.
+    В режиме WAL журнал затем сбрасывается в основной файл.
+    """
+    statements = ["ANALYZE" if full else "PRAGMA optimize"]
+    with connection.cursor() as cursor:
+        cursor.execute(statements[0])
+        cursor.execute("PRAGMA journal_mode")
+        if cursor.fetchone()[0] == "wal":
+            statements.append("PRAGMA wal_checkpoint(TRUNCATE)")
+            cursor.execute(statements[-1])
+    return statements
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        apply_pragmas(connection)
@@ -0,0 +1,25 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page, size=2):
+    """
+    Номера страниц вокруг текущей плюс первая и последняя; None отмечает
+    пропуск. Число ссылок не зависит от числа страниц.
+    """
+    last = page.paginator.num_pages
+    start = max(page.number - size, 1)
+    end = min(page.number + size, last)
+    numbers = []
+    if start > 1:
+        numbers.append(1)
+        if start > 2:
+            numbers.append(None)
+    numbers.extend(range(start, end + 1))
+    if end < last:
+        if end < last - 1:
+            numbers.append(None)
+        numbers.append(last)
+    return numbers
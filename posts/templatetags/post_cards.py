@@ -0,0 +1,15 @@
+from django import template
+
+from posts.cards import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    return cards(posts)
+
+
+@register.simple_tag
+def post_card(post):
+    return cards([post])[0]
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+from posts.tests.utils import run_on_commit
+
+
+class ApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = get_user_model().objects.create(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.post = Post.objects.create(text='Запись', author=self.author,
+                                        group=self.group)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        self.client = Client()
+
+    def test_feeds_return_compact_json(self):
+        """Ленты отдают записи в JSON."""
+        urls = (
+            reverse('api_index'),
+            reverse('api_group', args=['group']),
+            reverse('api_profile', args=['author']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(data['results'][0]['id'], self.post.id)
+                self.assertEqual(data['results'][0]['group'], 'group')
+                self.assertEqual(data['results'][0]['comment_count'], 1)
+                self.assertIsNone(data['next'])
+
+    def test_feed_is_paginated_by_cursor(self):
+        """Следующая страница ленты запрашивается по курсору."""
+        for number in range(25):
+            Post.objects.create(text=f'Запись {number}', author=self.author)
+        first = self.client.get(reverse('api_index')).json()
+        second = self.client.get(reverse('api_index'),
+                                 {'after': first['next']}).json()
+        self.assertEqual(len(first['results']), 20)
+        self.assertEqual(len(second['results']), 6)
+        self.assertFalse({post['id'] for post in first['results']}
+                         & {post['id'] for post in second['results']})
+
+    def test_post_view_contains_comments(self):
+        """Запись отдаётся вместе с комментариями."""
+        data = self.client.get(reverse('api_post', args=[self.post.id])).json()
+        self.assertEqual(data['text'], 'Запись')
+        self.assertEqual(data['comments'][0]['text'], 'Комментарий')
+
+    def test_conditional_get(self):
+        """Совпавший ETag даёт 304 без запросов к базе, правка меняет ETag."""
+        url = reverse('api_index')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with run_on_commit():
+            Post.objects.create(text='Новая', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_changes_post_etag(self):
+        """Новый комментарий меняет ETag записи."""
+        url = reverse('api_post', args=[self.post.id])
+        etag = self.client.get(url)['ETag']
+        with run_on_commit():
+            Comment.objects.create(post=self.post, author=self.author,
+                                   text='Ещё один')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_unknown_objects_return_404(self):
+        """Несуществующие группа, автор и запись дают 404."""
+        for url in (reverse('api_group', args=['missing']),
+                    reverse('api_profile', args=['missing']),
+                    reverse('api_post', args=[999])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
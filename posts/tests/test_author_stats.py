@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.author_stats import author_stats
+from posts.models import Follow, Post
+from posts.tests.utils import run_on_commit
+
+
+class AuthorStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        Post.objects.create(author=self.author, text='Первая запись')
+
+    def test_repeated_lookup_uses_cache(self):
+        """Повторный запрос счётчиков и подписки не обращается к базе."""
+        first = author_stats(self.author, self.reader)
+        with self.assertNumQueries(0):
+            second = author_stats(self.author, self.reader)
+        self.assertEqual(first, second)
+        self.assertEqual(second.post_count, 1)
+        self.assertFalse(second.following)
+
+    def test_signals_refresh_cached_values(self):
+        """Новые записи и подписки сразу видны в закэшированных данных."""
+        author_stats(self.author, self.reader)
+        author_stats(self.reader)
+
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Вторая запись')
+            Follow.objects.create(user=self.reader, author=self.author)
+
+        stats = author_stats(self.author, self.reader)
+        self.assertEqual((stats.post_count, stats.follower_count),
+                         (2, 1))
+        self.assertTrue(stats.following)
+        self.assertEqual(author_stats(self.reader).following_count, 1)
+
+        with run_on_commit():
+            Follow.objects.filter(user=self.reader).delete()
+        stats = author_stats(self.author, self.reader)
+        self.assertEqual(stats.follower_count, 0)
+        self.assertFalse(stats.following)
+
+    def test_cache_is_reset_after_commit(self):
+        """До фиксации подписки ключ не сбрасывается."""
+        author_stats(self.author)
+        with run_on_commit():
+            Follow.objects.create(user=self.reader, author=self.author)
+            self.assertEqual(author_stats(self.author).follower_count, 0)
+        self.assertEqual(author_stats(self.author).follower_count, 1)
+
+    def test_profile_shows_cached_stats(self):
+        """Профиль берёт счётчики и кнопку подписки из сервиса."""
+        client = Client()
+        client.force_login(self.reader)
+        client.get(reverse('profile_follow', args=['author']))
+
+        response = client.get(reverse('profile', args=['author']))
+
+        self.assertEqual(response.context['post_count'], 1)
+        self.assertTrue(response.context['following'])
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response,
+                            reverse('profile_unfollow', args=['author']))
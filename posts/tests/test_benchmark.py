@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from posts import benchmark
+
+
+@override_settings(POSTS_PAGE_CACHE_TIMEOUT=0)
+class BenchmarkTest(TestCase):
+    def test_run_reports_metrics_for_every_view(self):
+        """Замеры собираются по всем страницам из сценария."""
+        call_command('seed_data', users=10, groups=3, posts=40, comments=40,
+                     follows=30, seed=1, stdout=StringIO())
+
+        results = benchmark.run(Client(), iterations=2, warmup=0)
+
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+            'new_post', 'add_comment',
+        })
+        for view, metrics in results.items():
+            with self.subTest(view=view):
+                self.assertGreater(metrics['queries'], 0)
+                self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+        self.assertGreater(results['index']['template_ms'], 0)
+
+    def test_compare_finds_regressions(self):
+        """Сравнение с базовыми замерами находит рост p95 и запросов."""
+        baseline = {'1000': {
+            'index': {'p95_ms': 10, 'queries': 3},
+            'profile': {'p95_ms': 10, 'queries': 5},
+        }}
+        results = {'1000': {
+            'index': {'p95_ms': 11, 'queries': 3},
+            'profile': {'p95_ms': 30, 'queries': 6},
+            'post_view': {'p95_ms': 99, 'queries': 50},
+        }}
+
+        regressions = benchmark.compare(results, baseline, tolerance=0.2)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith('1000/profile')
+                            for line in regressions))
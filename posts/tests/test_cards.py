@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cards import card_key, cards
+from posts.models import Comment, Group, Post
+
+
+@override_settings(POSTS_PAGE_CACHE_TIMEOUT=0)
+class PostCardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = get_user_model().objects.create(username='author')
+        self.reader = get_user_model().objects.create(username='reader')
+        self.group = Group.objects.create(title='Старое название',
+                                          slug='group')
+        self.post = Post.objects.create(text='Текст записи',
+                                        author=self.author,
+                                        group=self.group)
+
+    def feed_post(self):
+        return Post.objects.for_feed().get(pk=self.post.pk)
+
+    def test_cards_are_rendered_once(self):
+        """Повторная страница берёт карточки из кэша без отрисовки."""
+        with mock.patch('posts.cards.render_to_string',
+                        wraps=render_to_string) as render:
+            cards([self.feed_post()])
+            cards([self.feed_post()])
+        self.assertEqual(render.call_count, 1)
+
+    def test_key_follows_edits_and_comments(self):
+        """Ключ карточки меняется при правке записи и новом комментарии."""
+        keys = {card_key(self.feed_post())}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        keys.add(card_key(self.feed_post()))
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        keys.add(card_key(self.feed_post()))
+        self.assertEqual(len(keys), 3)
+
+    def test_group_rename_refreshes_card(self):
+        """Переименование группы попадает в карточки её записей."""
+        cards([self.feed_post()])
+        self.group.title = 'Новое название'
+        self.group.save()
+
+        card = cards([self.feed_post()])[0]
+        self.assertIn('Новое название', card.head)
+
+    def test_description_edit_keeps_posts(self):
+        """Правка описания группы не переписывает её записи."""
+        updated = self.feed_post().updated
+        self.group.description = 'Новое описание'
+        self.group.save()
+        self.assertEqual(self.feed_post().updated, updated)
+
+    def test_group_delete_changes_key(self):
+        """Удаление группы меняет ключ карточки без правки updated."""
+        post = self.feed_post()
+        key = card_key(post)
+        self.group.delete()
+
+        changed = self.feed_post()
+        self.assertEqual(changed.updated, post.updated)
+        self.assertNotEqual(card_key(changed), key)
+        self.assertNotIn('Старое название', cards([changed])[0].head)
+
+    def test_author_rename_refreshes_card(self):
+        """Новое имя автора попадает в текст и ссылки карточки."""
+        cards([self.feed_post()])
+        self.author.username = 'renamed'
+        self.author.save()
+
+        card = cards([self.feed_post()])[0]
+        self.assertIn('@renamed', card.head)
+        self.assertIn(reverse('profile', args=['renamed']), card.head)
+        self.assertEqual(card.url, reverse('post', args=['renamed',
+                                                         self.post.pk]))
+
+    def test_buttons_depend_on_viewer(self):
+        """Общая карточка, но кнопки у каждого читателя свои."""
+        edit_url = reverse('post_edit', args=['author', self.post.pk])
+        comment_url = reverse('post', args=['author', self.post.pk])
+        clients = {'author': Client(), 'reader': Client(), 'guest': Client()}
+        clients['author'].force_login(self.author)
+        clients['reader'].force_login(self.reader)
+
+        pages = {name: client.get(reverse('index')).content.decode()
+                 for name, client in clients.items()}
+
+        self.assertIn(edit_url, pages['author'])
+        self.assertNotIn(edit_url, pages['reader'])
+        self.assertIn(f'href="{comment_url}"', pages['reader'])
+        self.assertNotIn(f'href="{comment_url}"', pages['guest'])
+        for page in pages.values():
+            self.assertIn('Текст записи', page)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.first = Post.objects.create(text='Первая, с запятой',
+                                         author=self.author,
+                                         group=self.group)
+        self.second = Post.objects.create(text='Вторая', author=self.author)
+        Comment.objects.create(post=self.first, author=self.author,
+                               text='Комментарий')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_profile_export_jsonl(self):
+        """Выгрузка автора в JSONL идёт потоком в порядке id."""
+        response = self.client.get(
+            reverse('profile_export', args=[self.author.username])
+        )
+        records = [json.loads(line)
+                   for line in self.read(response).splitlines()]
+
+        self.assertEqual([record['id'] for record in records],
+                         [self.first.id, self.second.id])
+        self.assertEqual(records[0]['group'], 'group')
+        self.assertEqual(records[0]['comment_count'], 1)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_group_export_csv(self):
+        """Выгрузка группы в CSV содержит только записи группы."""
+        response = self.client.get(reverse('group_export', args=['group']),
+                                   {'format': 'csv'})
+        rows = list(csv.reader(io.StringIO(self.read(response))))
+
+        self.assertEqual(rows[0][:3], ['id', 'author', 'group'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][3], 'Первая, с запятой')
+
+    def test_export_requires_login_and_known_format(self):
+        """Выгрузка доступна только вошедшим и в известных форматах."""
+        url = reverse('profile_export', args=[self.author.username])
+        self.assertEqual(Client().get(url).status_code, 302)
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code,
+                         400)
+
+    def test_admin_action_streams_selected_posts(self):
+        """Действие админки выгружает выбранные записи."""
+        admin = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'export_jsonl',
+            '_selected_action': [self.second.id],
+        })
+        records = [json.loads(line)
+                   for line in self.read(response).splitlines()]
+        self.assertEqual([record['id'] for record in records],
+                         [self.second.id])
@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow, Post
+from posts.tests.utils import run_on_commit
+from posts.timeline import pull_authors
+
+
+class FollowGraphTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.reader = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+        self.other = User.objects.create(username='other')
+
+    def test_followees_follow_changes(self):
+        """Множество подписок кэшируется и меняется с подписками."""
+        self.assertEqual(follow_graph.followees(self.reader.pk), set())
+        with self.assertNumQueries(0):
+            follow_graph.followees(self.reader.pk)
+
+        with run_on_commit():
+            Follow.objects.create(user=self.reader, author=self.author)
+            Follow.objects.create(user=self.reader, author=self.other)
+        self.assertEqual(follow_graph.followees(self.reader.pk),
+                         {self.author.pk, self.other.pk})
+
+        with run_on_commit():
+            Follow.objects.filter(author=self.other).delete()
+        self.assertEqual(follow_graph.followees(self.reader.pk),
+                         {self.author.pk})
+
+    @override_settings(POSTS_FANOUT_THRESHOLD=0)
+    def test_follower_counts_drive_pull_authors(self):
+        """Числа подписчиков в кэше меняются вместе с подписками."""
+        self.assertEqual(pull_authors([self.author.pk]), set())
+
+        with run_on_commit():
+            Follow.objects.create(user=self.reader, author=self.author)
+
+        self.assertEqual(follow_graph.follower_counts([self.author.pk]),
+                         {self.author.pk: 1})
+        self.assertEqual(pull_authors([self.author.pk]), {self.author.pk})
+
+    def test_follow_feed_reads_followees_from_cache(self):
+        """Лента подписок не читает таблицу подписок при тёплом кэше."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Запись')
+        client = Client()
+        client.force_login(self.reader)
+        client.get(reverse('follow_index'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('follow_index'))
+
+        self.assertEqual(list(response.context['page']), [post])
+        self.assertFalse([query for query in queries
+                          if 'posts_follow' in query['sql']])
+
+    def test_warm_command_loads_graph(self):
+        """Команда warm_follow_graph заполняет кэш для всех пользователей."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+
+        with self.settings(SHARED_CACHE=True):
+            call_command('warm_follow_graph', stdout=StringIO())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(follow_graph.followees(self.reader.pk),
+                             {self.author.pk})
+            self.assertEqual(
+                follow_graph.follower_counts([self.author.pk]),
+                {self.author.pk: 1},
+            )
+
+    def test_warm_refuses_process_local_cache(self):
+        """Без общего кэша прогрев бесполезен, и команда не запускается."""
+        with self.settings(SHARED_CACHE=False):
+            with self.assertRaisesMessage(CommandError, 'YATUBE_CACHE_DIR'):
+                call_command('warm_follow_graph', stdout=StringIO())
+
+
+class FollowGraphCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.reader = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+
+    def test_keys_are_reset_after_commit(self):
+        """Чтение до фиксации подписки не оставляет в кэше старый граф."""
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+            # Так кэш заполнил бы читатель, видящий строки до COMMIT.
+            cache.set_many({
+                follow_graph.followees_key(self.reader.pk): frozenset(),
+                follow_graph.FOLLOWERS_KEY.format(self.author.pk): 0,
+            })
+
+        self.assertEqual(follow_graph.followees(self.reader.pk),
+                         {self.author.pk})
+        self.assertEqual(follow_graph.follower_counts([self.author.pk]),
+                         {self.author.pk: 1})
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, FeedEntry, Follow, Group, Post, UserStats
+
+
+class ImportPostsTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+
+    def import_lines(self, lines, **options):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line if isinstance(line, str)
+                             else json.dumps(line, ensure_ascii=False))
+                output.write('\n')
+        stderr = StringIO()
+        call_command('import_posts', path, stdout=StringIO(), stderr=stderr,
+                     **options)
+        return stderr.getvalue()
+
+    def test_import_posts_with_comments(self):
+        """Записи и комментарии загружаются, счётчики и ленты обновляются."""
+        errors = self.import_lines([
+            {'author': 'author', 'text': 'Первая', 'group': 'group',
+             'pub_date': '2020-01-02T03:04:05',
+             'comments': [{'author': 'reader', 'text': 'Ответ'},
+                          {'author': 'author', 'text': 'Спасибо'}]},
+            '{"author": "author", "text": ',
+            {'author': 'nobody', 'text': 'Чужая'},
+            '',
+            {'author': 'author', 'text': 'Вторая'},
+        ], chunk_size=2, batch_size=1)
+
+        first = Post.objects.get(text='Первая')
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.pub_date,
+                         timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5)))
+        self.assertEqual(first.comment_count, 2)
+        self.assertEqual(Comment.objects.filter(post=first).count(), 2)
+        self.assertTrue(Post.objects.filter(text='Вторая').exists())
+        self.assertFalse(Post.objects.filter(text='Чужая').exists())
+        self.assertEqual(UserStats.objects.get(user=self.author).post_count,
+                         2)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         2)
+        self.assertIn('Строка 2', errors)
+        self.assertIn('nobody', errors)
+
+    def test_create_users(self):
+        """С флагом --create-users неизвестные авторы создаются."""
+        self.import_lines([{'author': 'newcomer', 'text': 'Привет'}],
+                          create_users=True)
+
+        post = Post.objects.get(text='Привет')
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertFalse(post.author.has_usable_password())
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.middleware import page_cache_stats
+from posts.models import Comment, Group, Post
+from posts.tests.utils import run_on_commit
+
+
+@override_settings(POSTS_PAGE_CACHE_TIMEOUT=60)
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='AuthorUser')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test-group')
+        self.post = Post.objects.create(text='Тестовая запись',
+                                        author=self.user, group=self.group)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+        self.urls = {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={'slug': 'test-group'}),
+            'profile': reverse('profile', kwargs={'username': 'AuthorUser'}),
+            'post': reverse('post', kwargs={'username': 'AuthorUser',
+                                            'post_id': self.post.pk}),
+        }
+
+    def test_anonymous_pages_are_cached(self):
+        """Повторный запрос анонима отдаётся из кэша."""
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.guest_client.get(url)['X-Cache'],
+                                 'MISS')
+                self.assertEqual(self.guest_client.get(url)['X-Cache'],
+                                 'HIT')
+        self.assertEqual(page_cache_stats(), {'hits': 4, 'misses': 4})
+
+    def test_stats_command_requires_shared_cache(self):
+        """Счётчики других процессов видны только в общем кэше."""
+        self.guest_client.get(self.urls['index'])
+        self.guest_client.get(self.urls['index'])
+        out = StringIO()
+        with self.settings(SHARED_CACHE=True):
+            call_command('page_cache_stats', stdout=out)
+        self.assertIn('Попаданий: 1, промахов: 1', out.getvalue())
+
+        with self.settings(SHARED_CACHE=False):
+            with self.assertRaisesMessage(CommandError, 'YATUBE_CACHE_DIR'):
+                call_command('page_cache_stats', stdout=StringIO())
+
+    def test_pages_are_purged_after_commit(self):
+        """Страница остаётся в кэше, пока запись не зафиксирована."""
+        url = self.urls['index']
+        self.guest_client.get(url)
+        with run_on_commit():
+            Post.objects.create(text='Новая запись', author=self.user)
+            self.assertEqual(self.guest_client.get(url)['X-Cache'], 'HIT')
+        self.assertEqual(self.guest_client.get(url)['X-Cache'], 'MISS')
+
+    def test_authorized_pages_are_not_cached(self):
+        """Страницы авторизованных пользователей не кэшируются."""
+        self.authorized_client.get(self.urls['index'])
+        response = self.authorized_client.get(self.urls['index'])
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_comment_purges_only_affected_pages(self):
+        """Комментарий сбрасывает страницы своей записи, но не чужие."""
+        other = get_user_model().objects.create(username='OtherUser')
+        other_url = reverse('profile', kwargs={'username': 'OtherUser'})
+        for url in (*self.urls.values(), other_url):
+            self.guest_client.get(url)
+
+        with run_on_commit():
+            Comment.objects.create(post=self.post, author=other,
+                                   text='Комментарий')
+
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.guest_client.get(url)['X-Cache'],
+                                 'MISS')
+        self.assertEqual(self.guest_client.get(other_url)['X-Cache'], 'HIT')
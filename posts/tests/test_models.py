@@ -1,7 +1,13 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
 
-from posts.models import Group, Post
+from posts.models import (Comment, Follow, Group, GroupStats, Post,
+                          UserStats)
 
 
 class PostModelTest(TestCase):
@@ -100,3 +106,170 @@ class PostModelTest(TestCase):
         max_length = 15
         len_post_str_value = len(self.post.__str__())
         self.assertEqual(max_length, len_post_str_value)
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create(username='AuthorUser')
+        self.reader = User.objects.create(username='ReaderUser')
+        self.post = Post.objects.create(text='Тестовая запись',
+                                        author=self.author)
+
+    def test_comment_count_follows_comments(self):
+        """Счётчик комментариев меняется при создании и удалении."""
+        comment = Comment.objects.create(post=self.post, author=self.reader,
+                                         text='Комментарий')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_user_stats_follow_posts_and_follows(self):
+        """Счётчики записей и подписок хранятся в UserStats."""
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        self.assertEqual(
+            (self.author.stats.post_count, self.author.stats.follower_count),
+            (1, 1)
+        )
+        self.assertEqual(UserStats.objects.get(user=self.reader)
+                         .following_count, 1)
+
+        Follow.objects.all().delete()
+        self.post.delete()
+        self.author.stats.refresh_from_db()
+        self.assertEqual(
+            (self.author.stats.post_count, self.author.stats.follower_count),
+            (0, 0)
+        )
+
+    def test_recount_stats_fixes_drift(self):
+        """Команда recount_stats исправляет рассинхронизацию счётчиков."""
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Post.objects.update(comment_count=10)
+        UserStats.objects.update(post_count=7)
+
+        err = StringIO()
+        with self.settings(SHARED_CACHE=False):
+            call_command('recount_stats', stdout=StringIO(), stderr=err)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(UserStats.objects.get(user=self.author).post_count,
+                         1)
+        self.assertIn('YATUBE_CACHE_DIR', err.getvalue())
+
+
+class GroupStatsTest(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create(username='AuthorUser')
+        self.first = Group.objects.create(title='Первая', slug='first')
+        self.second = Group.objects.create(title='Вторая', slug='second')
+
+    def stats(self, group):
+        return GroupStats.objects.values_list(
+            'post_count', 'latest_post', 'last_post_at'
+        ).get(group=group)
+
+    def test_stats_follow_create_move_and_delete(self):
+        """Число записей и последняя запись следуют за записями группы."""
+        old = Post.objects.create(text='Старая', author=self.author,
+                                  group=self.first)
+        new = Post.objects.create(text='Новая', author=self.author,
+                                  group=self.first)
+        self.assertEqual(self.stats(self.first),
+                         (2, new.pk, new.pub_date))
+
+        new.group = self.second
+        new.save()
+        self.assertEqual(self.stats(self.first),
+                         (1, old.pk, old.pub_date))
+        self.assertEqual(self.stats(self.second),
+                         (1, new.pk, new.pub_date))
+
+        old.delete()
+        self.assertEqual(self.stats(self.first), (0, None, None))
+
+    def test_rebuild_group_stats_fixes_drift(self):
+        """Команда rebuild_group_stats пересчитывает статистику групп."""
+        post = Post.objects.create(text='Запись', author=self.author,
+                                   group=self.second)
+        GroupStats.objects.all().delete()
+        Group.objects.bulk_create([Group(title='Третья', slug='third')])
+
+        err = StringIO()
+        with self.settings(SHARED_CACHE=True):
+            call_command('rebuild_group_stats', stdout=StringIO(),
+                         stderr=err)
+
+        self.assertEqual(GroupStats.objects.count(), 3)
+        self.assertEqual(self.stats(self.second),
+                         (1, post.pk, post.pub_date))
+        self.assertEqual(self.stats(self.first), (0, None, None))
+        self.assertEqual(err.getvalue(), '')
+
+
+class RenderedTextTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='testuser')
+
+    def test_html_and_excerpt_are_computed_on_save(self):
+        """При сохранении текст экранируется, а выдержка обрезается."""
+        post = Post.objects.create(author=self.user,
+                                   text='<b>Жирный</b>\nвторая строка')
+        self.assertEqual(post.text_html,
+                         '&lt;b&gt;Жирный&lt;/b&gt;<br>вторая строка')
+        self.assertEqual(post.excerpt, '<b>Жирный</b> вторая строка')
+
+        post.text = 'слово ' * 100
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(len(post.excerpt), Post.EXCERPT_LENGTH)
+        self.assertTrue(post.text_html.startswith('слово слово'))
+
+    def test_feed_does_not_load_source_text(self):
+        """Лента читает готовый HTML без исходного текста."""
+        Post.objects.create(author=self.user, text='Текст')
+        post = Post.objects.for_feed().get()
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertNotIn('text_html', post.get_deferred_fields())
+
+    def test_render_texts_fills_old_rows(self):
+        """Команда render_texts заполняет пустые поля старых строк."""
+        post = Post.objects.create(author=self.user, text='Старая\nзапись')
+        comment = Comment.objects.create(post=post, author=self.user,
+                                         text='Старый комментарий')
+        Post.objects.update(text_html='', excerpt='')
+        Comment.objects.update(text_html='', excerpt='')
+
+        call_command('render_texts', batch_size=1, stdout=StringIO())
+
+        post.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual(post.text_html, 'Старая<br>запись')
+        self.assertEqual(comment.excerpt, 'Старый комментарий')
+
+
+class RenderedTextMigrationTest(TransactionTestCase):
+    def test_migration_renders_existing_rows(self):
+        """Миграция заполняет HTML записей, сохранённых до неё."""
+        call_command('migrate', 'posts', '0021', verbosity=0)
+        old_apps = MigrationExecutor(connection).loader.project_state(
+            ('posts', '0021_post_updated')
+        ).apps
+        user = old_apps.get_model('auth', 'User').objects.create(
+            username='testuser'
+        )
+        old_apps.get_model('posts', 'Post').objects.create(
+            author=user, text='Старая\nзапись'
+        )
+
+        call_command('migrate', 'posts', verbosity=0)
+
+        post = Post.objects.get()
+        self.assertEqual(post.text_html, 'Старая<br>запись')
+        self.assertEqual(post.excerpt, 'Старая запись')
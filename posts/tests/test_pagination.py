@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+from posts.pagination import KeysetPaginator, encode_cursor
+from posts.templatetags.pagination_tags import page_window
+from posts.tests.utils import run_on_commit
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='testuser')
+
+        Post.objects.bulk_create([
+            Post(text=f'Тестовая запись {number}', author=cls.user)
+            for number in range(25)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_pages_follow_default_ordering(self):
+        """Курсорные страницы повторяют порядок Post.objects.all()."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        collected = []
+        page = paginator.get_page()
+        while True:
+            collected.extend(page)
+            if not page.has_next():
+                break
+            page = paginator.get_page(after=page.next_cursor)
+
+        self.assertEqual(collected, list(Post.objects.all()))
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор before возвращает предыдущую страницу."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        first = paginator.get_page()
+        second = paginator.get_page(after=first.next_cursor)
+        back = paginator.get_page(before=second.previous_cursor)
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Некорректный курсор приводит к первой странице."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        for cursor in ('мусор', encode_cursor(['не дата', 'x'])):
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(after=cursor)
+                self.assertEqual(list(page), list(Post.objects.all()[:10]))
+
+    def test_index_keyset_mode_skips_count_query(self):
+        """Курсорная страница index не выполняет COUNT(*)."""
+        response = self.guest_client.get(reverse('index'))
+        cursor = str(response.context['page'].next_cursor)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(
+                reverse('index'), {'after': cursor}
+            )
+        self.assertFalse(
+            [query for query in queries if 'COUNT(' in query['sql']]
+        )
+        self.assertEqual(list(response.context['page']),
+                         list(Post.objects.all()[10:20]))
+
+
+def count_queries(queries):
+    return sum('COUNT(' in query['sql'] for query in queries)
+
+
+@override_settings(POSTS_PAGE_CACHE_TIMEOUT=0)
+class CachedCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='testuser')
+        for number in range(3):
+            Post.objects.create(text=f'Запись {number}', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('index'))
+        return response, count_queries(queries)
+
+    def test_count_is_cached_until_feed_changes(self):
+        """COUNT(*) выполняется заново только после изменения ленты."""
+        _, first = self.get_index()
+        _, second = self.get_index()
+        self.assertEqual((first, second), (1, 0))
+
+        with run_on_commit():
+            Post.objects.create(text='Новая', author=self.user)
+        response, third = self.get_index()
+        self.assertEqual(third, 1)
+        self.assertEqual(response.context['paginator'].count, 4)
+
+    @override_settings(POSTS_COUNT_ESTIMATE_FROM=1)
+    def test_large_count_is_refreshed_after_response(self):
+        """Крупное число отдаётся как оценка и уточняется после ответа."""
+        self.get_index()
+        with run_on_commit():
+            Post.objects.create(text='Новая', author=self.user)
+
+        response, queries = self.get_index()
+        self.assertEqual(response.context['paginator'].count, 3)
+        # Пересчёт выполнен после отправки ответа (request_finished).
+        self.assertEqual(queries, 1)
+        response, queries = self.get_index()
+        self.assertEqual(response.context['paginator'].count, 4)
+        self.assertEqual(queries, 0)
+
+    def test_profile_uses_stored_counter(self):
+        """Профиль берёт число записей из UserStats без COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('profile', kwargs={'username': 'testuser'})
+            )
+        self.assertEqual(response.context['paginator'].count, 3)
+        self.assertEqual(count_queries(queries), 0)
+
+
+class PageWindowTest(TestCase):
+    def window(self, number, pages):
+        paginator = Paginator(range(pages), 1)
+        return page_window(paginator.page(number))
+
+    def test_window_around_current_page(self):
+        """Выводятся соседние страницы, первая, последняя и пропуски."""
+        self.assertEqual(self.window(50, 1000),
+                         [1, None, 48, 49, 50, 51, 52, None, 1000])
+        self.assertEqual(self.window(1, 1000), [1, 2, 3, None, 1000])
+        self.assertEqual(self.window(4, 6), [1, 2, 3, 4, 5, 6])
@@ -0,0 +1,135 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, UserStats
+from posts.pagination import KeysetPaginator
+from posts.timeline import MergedFeed
+
+FORBIDDEN = ("USE TEMP B-TREE",)
+
+
+def bad_plan_lines(sql):
+    """
+    Строки плана с сортировкой во временном B-дереве или с просмотром
+    таблицы без индекса. Просмотр подзапроса (производной таблицы) и
+    виртуальной таблицы FTS допустим.
+    """
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+    return [
+        detail for detail in details
+        if detail.startswith(FORBIDDEN)
+        or (scanned_table(detail) in tables and "INDEX" not in detail)
+    ]
+
+
+def scanned_table(detail):
+    """
+    Таблица из строки «SCAN posts_post» (SQLite 3.36 и новее) или
+    «SCAN TABLE posts_post» (более ранние версии).
+    """
+    words = detail.split()
+    if words[:1] != ["SCAN"]:
+        return None
+    if words[1:2] == ["TABLE"]:
+        words = words[1:]
+    return words[1] if len(words) > 1 else None
+
+
+@override_settings(POSTS_PAGE_CACHE_TIMEOUT=0)
+class QueryPlanTest(TestCase):
+    """Запросы основных страниц идут по индексам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', users=60, groups=5, posts=600,
+                     comments=900, follows=400, seed=7, stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        stats = UserStats.objects.select_related('user')
+        self.reader = stats.order_by('-following_count').first().user
+        self.author = stats.order_by('-post_count').first().user
+        self.group = Group.objects.filter(posts__isnull=False).first()
+        self.post = Post.objects.select_related('author').order_by(
+            '-comment_count'
+        ).first()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        post_kwargs = {'username': self.post.author.username,
+                       'post_id': self.post.id}
+        cursor = KeysetPaginator(Post.objects.all(), 10).cursor_for(
+            Post.objects.all()[15]
+        )
+        comment_cursor = KeysetPaginator(
+            Comment.objects.order_by('created', 'id'), 10
+        ).cursor_for(self.post.comments.order_by('created', 'id').first())
+        return (
+            reverse('index'),
+            reverse('index') + '?page=3',
+            reverse('index') + f'?after={cursor}',
+            reverse('index') + f'?before={cursor}',
+            reverse('group', args=[self.group.slug]),
+            reverse('group_list'),
+            reverse('profile', args=[self.author.username]),
+            reverse('post', kwargs=post_kwargs),
+            reverse('post_comments', kwargs=post_kwargs)
+            + f'?after={comment_cursor}',
+            reverse('follow_index'),
+            reverse('api_index'),
+            reverse('api_group', args=[self.group.slug]),
+            reverse('api_profile', args=[self.author.username]),
+            reverse('api_post', args=[self.post.id]),
+        )
+
+    def assert_plans_use_indexes(self, urls):
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            for query in queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(bad_plan_lines(sql), [])
+
+    def test_hot_queries_use_indexes(self):
+        """Ни один запрос не просматривает таблицу целиком и не сортирует."""
+        self.assert_plans_use_indexes(self.urls())
+
+    @override_settings(POSTS_FANOUT_THRESHOLD=0)
+    def test_pulled_follow_feed_uses_indexes(self):
+        """Лента с авторами, читаемыми при запросе, тоже идёт по индексам."""
+        url = reverse('follow_index')
+        response = self.client.get(url)
+        self.assertIsInstance(response.context['paginator'].object_list,
+                              MergedFeed)
+        cursor = response.context['page'].next_cursor
+        self.assert_plans_use_indexes(
+            [url, url + '?page=2', url + f'?after={cursor}',
+             url + f'?before={cursor}']
+        )
+
+    def test_scanned_table_reads_both_plan_formats(self):
+        """Имя таблицы берётся из плана старых и новых версий SQLite."""
+        self.assertEqual(scanned_table('SCAN posts_post'), 'posts_post')
+        self.assertEqual(scanned_table('SCAN TABLE posts_post'),
+                         'posts_post')
+        self.assertEqual(
+            scanned_table('SCAN TABLE posts_post USING INDEX post_date'),
+            'posts_post'
+        )
+        self.assertIsNone(scanned_table('SEARCH posts_post USING INDEX x'))
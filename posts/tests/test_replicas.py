@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import replicas, views
+from posts.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from posts.models import Post
+from posts.replicas import ReplicaRouter, copy_database
+
+
+@override_settings(POSTS_READ_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, view):
+        """Куда пошло бы чтение внутри представления view."""
+        seen = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        self.assertFalse(replicas.replicas_enabled())
+        return seen[0], response
+
+    def test_router_reads_from_replica_only_when_enabled(self):
+        """Чтение уходит на реплику только в разрешённом контексте."""
+        self.assertIsNone(self.router.db_for_read(Post))
+        with replicas.read_from_replicas():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    def test_listed_views_read_from_replica(self):
+        """Ленты читаются с реплики, форма новой записи — из основной."""
+        database, _ = self.route(self.factory.get('/'), views.index)
+        self.assertEqual(database, 'replica')
+        database, _ = self.route(self.factory.get('/new/'), views.new_post)
+        self.assertIsNone(database)
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент временно читает из основной базы."""
+        _, response = self.route(self.factory.post('/new/'), views.new_post)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        database, _ = self.route(request, views.index)
+        self.assertIsNone(database)
+
+    def test_get_write_pins_client_to_primary(self):
+        """Подписка по GET тоже переводит клиента на основную базу."""
+        User = get_user_model()
+        reader = User.objects.create(username='reader')
+        User.objects.create(username='author')
+        client = Client()
+        client.force_login(reader)
+
+        response = client.get(reverse('profile_follow', args=['author']))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        response = client.get(reverse('about:author'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(POSTS_PRIMARY_PIN_SECONDS=5)
+    def test_replica_reads_are_cached_briefly(self):
+        """Данные с реплики кэшируются не дольше окна отставания."""
+        self.assertEqual(replicas.cache_timeout(3600), 3600)
+        with replicas.read_from_replicas():
+            self.assertEqual(replicas.cache_timeout(3600), 5)
+            self.assertEqual(replicas.cache_timeout(None), 5)
+
+
+class CopyDatabaseTest(TestCase):
+    def test_copy_database(self):
+        """Реплика получает согласованную копию файла основной базы."""
+        directory = tempfile.mkdtemp()
+        source = os.path.join(directory, 'primary.sqlite3')
+        target = os.path.join(directory, 'replica.sqlite3')
+        with sqlite3.connect(source) as connection:
+            connection.execute('CREATE TABLE item (name TEXT)')
+            connection.execute("INSERT INTO item VALUES ('first')")
+        connection.close()
+
+        copy_database(source, target)
+
+        with sqlite3.connect(target) as connection:
+            rows = connection.execute('SELECT name FROM item').fetchall()
+        connection.close()
+        self.assertEqual(rows, [('first',)])
+        for path in (source, target):
+            os.remove(path)
+        os.rmdir(directory)
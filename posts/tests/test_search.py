@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import TABLE, search
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='testuser')
+        self.hedgehog = Post.objects.create(text='Ёжик гуляет в тумане',
+                                            author=self.user)
+        self.fog = Post.objects.create(
+            text='Туманы, туманы, туманное утро', author=self.user
+        )
+        Post.objects.create(text='Солнечный день', author=self.user)
+        self.guest_client = Client()
+
+    def test_russian_word_forms_are_found(self):
+        """Поиск находит другие формы слова и не различает «ё» и «е»."""
+        cases = {
+            'туман': {self.hedgehog, self.fog},
+            'ежики': {self.hedgehog},
+            'ТУМАНЫ ёжик': {self.hedgehog},
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(set(search(query, 10)), expected)
+
+    def test_results_are_ranked_and_paginated(self):
+        """Результаты упорядочены по релевантности и листаются курсором."""
+        first = search('туман', 1)
+        self.assertEqual(list(first), [self.fog])
+
+        second = search('туман', 1, after=first.next_cursor)
+        self.assertEqual(list(second), [self.hedgehog])
+        self.assertFalse(second.has_next())
+
+    def test_index_follows_updates_and_deletes(self):
+        """Индекс обновляется при изменении и удалении записи."""
+        self.hedgehog.text = 'Белка на дереве'
+        self.hedgehog.save()
+        self.fog.delete()
+
+        self.assertEqual(list(search('туман', 10)), [])
+        self.assertEqual(list(search('белка', 10)), [self.hedgehog])
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные записи."""
+        response = self.guest_client.get(reverse('search'), {'q': 'ёжик'})
+        self.assertContains(response, 'гуляет в тумане')
+        self.assertNotContains(response, 'Солнечный день')
+
+    def test_rebuild_command_restores_index(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {TABLE}({TABLE}) VALUES ('delete-all')"
+            )
+        self.assertEqual(list(search('туман', 10)), [])
+
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(set(search('туман', 10)), {self.hedgehog, self.fog})
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке использует полнотекстовый индекс."""
+        admin = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(reverse('admin:posts_post_changelist'),
+                              {'q': 'ежики'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.hedgehog])
+
+
+class SearchTriggerMigrationTest(TransactionTestCase):
+    def test_triggers_survive_table_rebuild(self):
+        """Миграции, пересоздающие posts_post, не отключают индекс."""
+        call_command('migrate', 'posts', '0020', verbosity=0)
+        call_command('migrate', 'posts', verbosity=0)
+
+        user = get_user_model().objects.create(username='testuser')
+        post = Post.objects.create(text='Пересозданная таблица',
+                                   author=user)
+        self.assertEqual(list(search('таблица', 10)), [post])
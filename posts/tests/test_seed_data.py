@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from posts.models import Comment, FeedEntry, Follow, Group, Post, UserStats
+
+
+class SeedDataTest(TestCase):
+    def test_seed_data_creates_consistent_dataset(self):
+        """seed_data создаёт данные с согласованными счётчиками и лентами."""
+        call_command('seed_data', users=30, groups=4, posts=200,
+                     comments=300, follows=120, batch_size=50, seed=1,
+                     stdout=StringIO())
+
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertEqual(Follow.objects.count(), 120)
+        self.assertEqual(
+            UserStats.objects.aggregate(total=Sum('post_count'))['total'],
+            200,
+        )
+        self.assertEqual(
+            Post.objects.aggregate(total=Sum('comment_count'))['total'], 300
+        )
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_distributions_are_skewed(self):
+        """Подписчики и даты публикации распределены неравномерно."""
+        call_command('seed_data', users=50, groups=5, posts=300,
+                     comments=0, follows=400, seed=2, stdout=StringIO())
+
+        followers = sorted(
+            UserStats.objects.values_list('follower_count', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(followers[0], 4 * followers[len(followers) // 2])
+        newest, oldest = (Post.objects.first().pub_date,
+                          Post.objects.last().pub_date)
+        self.assertGreater((newest - oldest).days, 30)
@@ -0,0 +1,49 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase
+
+from posts.sqlite import current_pragmas
+
+
+class SqlitePragmaTest(TestCase):
+    def test_connection_gets_pragmas(self):
+        """Новое соединение настраивается из POSTS_SQLITE_PRAGMAS."""
+        self.assertEqual(
+            current_pragmas(connection, ['synchronous', 'busy_timeout',
+                                         'temp_store', 'cache_size']),
+            {'synchronous': 1, 'busy_timeout': 5000, 'temp_store': 2,
+             'cache_size': -20000},
+        )
+
+    def test_file_database_switches_to_wal(self):
+        """Файловая база переводится в режим WAL."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = DatabaseWrapper(
+            dict(connection.settings_dict,
+                 NAME=os.path.join(directory.name, 'db.sqlite3')),
+            alias='pragma_check',
+        )
+        self.addCleanup(wrapper.close)
+
+        wrapper.ensure_connection()
+
+        self.assertEqual(
+            current_pragmas(wrapper, ['journal_mode'])['journal_mode'],
+            'wal',
+        )
+
+    def test_optimize_db_command(self):
+        """Обслуживание выполняет PRAGMA optimize или полный ANALYZE."""
+        out = StringIO()
+        call_command('optimize_db', stdout=out)
+        self.assertIn('PRAGMA optimize', out.getvalue())
+
+        out = StringIO()
+        call_command('optimize_db', full=True, stdout=out)
+        self.assertIn('ANALYZE', out.getvalue())
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.throttling import take
+
+
+@override_settings(POSTS_THROTTLE_RATES={'comment': '2/m', 'signup': '1/h'})
+class ThrottlingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='writer')
+        self.post = Post.objects.create(author=self.user, text='Запись')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.comment_url = reverse('add_comment', args=['writer',
+                                                        self.post.pk])
+
+    def test_bucket_refills_over_time(self):
+        """Жетоны кончаются и возвращаются со скоростью из настройки."""
+        self.assertEqual(take('comment', 'client', now=0), 0)
+        self.assertEqual(take('comment', 'client', now=0), 0)
+        self.assertEqual(take('comment', 'client', now=0), 30)
+        self.assertEqual(take('comment', 'client', now=30), 0)
+        self.assertEqual(take('comment', 'other', now=30), 0)
+
+    def test_decorated_view_returns_429_without_queries(self):
+        """Лишний комментарий отклоняется с Retry-After без SQL."""
+        for _ in range(2):
+            self.client.post(self.comment_url, {'text': 'Комментарий'})
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.comment_url,
+                                        {'text': 'Лишний'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_user_is_throttled_across_sessions(self):
+        """Новая сессия пользователя не даёт новой корзины."""
+        for _ in range(2):
+            self.client.post(self.comment_url, {'text': 'Комментарий'})
+
+        same_user = Client()
+        same_user.force_login(self.user)
+        response = same_user.post(self.comment_url, {'text': 'Ещё'})
+        self.assertEqual(response.status_code, 429)
+
+        other = Client()
+        other.force_login(
+            get_user_model().objects.create(username='reader')
+        )
+        response = other.post(self.comment_url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_middleware_throttles_signup_posts(self):
+        """Middleware ограничивает отправку формы регистрации."""
+        guest = Client()
+        url = reverse('signup')
+        self.assertEqual(guest.post(url, {}).status_code, 200)
+        with self.assertNumQueries(0):
+            response = guest.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(guest.get(url).status_code, 200)
+
+    def test_anonymous_rejection_makes_no_queries(self):
+        """Отказ анониму на представлении с декоратором обходится без SQL."""
+        guest = Client()
+        for _ in range(2):
+            guest.post(self.comment_url, {'text': 'Комментарий'})
+        with self.assertNumQueries(0):
+            response = guest.post(self.comment_url, {'text': 'Лишний'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_random_session_cookie_is_ignored(self):
+        """Случайная кука сессии не обходит ограничение по адресу."""
+        guest = Client()
+        url = reverse('signup')
+        statuses = []
+        for number in range(2):
+            guest.cookies[settings.SESSION_COOKIE_NAME] = f'forged{number:04}'
+            statuses.append(guest.post(url, {}).status_code)
+        self.assertEqual(statuses, [200, 429])
@@ -0,0 +1,108 @@
+import ast
+import re
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template.loader import get_template
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from posts.models import Post
+from posts.thumbnails import CARD_GEOMETRY, CARD_OPTIONS
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+def uploaded(name):
+    return SimpleUploadedFile(name=name, content=SMALL_GIF,
+                              content_type='image/gif')
+
+
+class ThumbnailScheduleTest(TransactionTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = get_user_model().objects.create(username='testuser')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_new_post_schedules_thumbnail(self):
+        """Миниатюра новой записи ставится в очередь после сохранения."""
+        with mock.patch('posts.thumbnails._submit') as submit:
+            self.client.post(reverse('new_post'),
+                             {'text': 'Тест', 'image': uploaded('new.gif')})
+        post = Post.objects.get()
+        submit.assert_called_once_with(post.image.name)
+
+    def test_edit_schedules_only_changed_image(self):
+        """При правке текста миниатюра заново не строится."""
+        post = Post.objects.create(text='Тест', author=self.user,
+                                   image=uploaded('old.gif'))
+        url = reverse('post_edit', kwargs={'username': self.user.username,
+                                           'post_id': post.id})
+        with mock.patch('posts.thumbnails._submit') as submit:
+            self.client.post(url, {'text': 'Новый текст'})
+            submit.assert_not_called()
+
+            self.client.post(url, {'text': 'Новый текст',
+                                   'image': uploaded('edited.gif')})
+        post.refresh_from_db()
+        submit.assert_called_once_with(post.image.name)
+
+
+class WarmThumbnailsTest(TestCase):
+    def test_command_processes_every_image(self):
+        """Команда warm_thumbnails обходит все изображения записей."""
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        user = get_user_model().objects.create(username='testuser')
+        images = {
+            Post.objects.create(text=f'Запись {i}', author=user,
+                                image=uploaded(f'{i}.gif')).image.name
+            for i in range(3)
+        }
+        Post.objects.create(text='Без картинки', author=user)
+
+        with mock.patch('posts.thumbnails.get_thumbnail') as get_thumbnail:
+            call_command('warm_thumbnails', workers=1, stdout=StringIO())
+        self.assertEqual(
+            {call.args[0] for call in get_thumbnail.call_args_list}, images
+        )
+
+
+class CardThumbnailTest(SimpleTestCase):
+    def test_settings_match_template(self):
+        """Размер и параметры миниатюры совпадают с тегом в карточке."""
+        source = get_template(
+            'posts/includes/post_card.html'
+        ).template.source
+        geometry, options = re.search(
+            r'{% thumbnail post\.image "([^"]+)" (.*?) as im %}', source
+        ).groups()
+        options = dict(option.split('=') for option in options.split())
+
+        self.assertEqual(geometry, CARD_GEOMETRY)
+        self.assertEqual(
+            {name: ast.literal_eval(value)
+             for name, value in options.items()},
+            CARD_OPTIONS
+        )
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import FeedEntry, Follow, Post
+from posts.tests.utils import run_on_commit
+from posts.timeline import feed_for
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.reader = User.objects.create(username='ReaderUser')
+        self.author = User.objects.create(username='AuthorUser')
+
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_new_post_is_pushed_to_followers(self):
+        """Новая запись попадает в ящики подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Тест', author=self.author)
+
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(list(feed_for(self.reader)), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ящик, отписка очищает его."""
+        Post.objects.create(text='Тест', author=self.author)
+
+        self.reader_client.get(
+            reverse('profile_follow', kwargs={'username': self.author})
+        )
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         1)
+
+        self.reader_client.get(
+            reverse('profile_unfollow', kwargs={'username': self.author})
+        )
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    @override_settings(POSTS_FANOUT_THRESHOLD=0)
+    def test_popular_author_is_read_on_request(self):
+        """Записи популярных авторов читаются при запросе ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Тест', author=self.author)
+
+        self.assertFalse(FeedEntry.objects.exists())
+        response = self.reader_client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']), [post])
+
+    @override_settings(POSTS_FANOUT_THRESHOLD=1)
+    def test_inbox_and_popular_authors_are_merged(self):
+        """Ящик и записи популярных авторов сливаются в одну ленту."""
+        User = get_user_model()
+        popular = User.objects.create(username='PopularUser')
+        other = User.objects.create(username='OtherUser')
+        for user in (self.reader, other):
+            with run_on_commit():
+                Follow.objects.create(user=user, author=popular)
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(12):
+            Post.objects.create(text=f'Тест {number}',
+                                author=(popular, self.author)[number % 2])
+        expected = list(Post.objects.all())
+
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         6)
+        self.assertEqual(list(feed_for(self.reader)), expected)
+        response = self.reader_client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']), expected[:10])
+        self.assertEqual(response.context['paginator'].count, 12)
+        response = self.reader_client.get(
+            reverse('follow_index'),
+            {'after': str(response.context['page'].next_cursor)}
+        )
+        self.assertEqual(list(response.context['page']), expected[10:])
+
+    @override_settings(POSTS_FANOUT_THRESHOLD=1)
+    def test_author_under_threshold_is_backfilled(self):
+        """Записи автора, опустившегося до порога, попадают в ящики."""
+        other = get_user_model().objects.create(username='OtherUser')
+        for user in (self.reader, other):
+            with run_on_commit():
+                Follow.objects.create(user=user, author=self.author)
+        post = Post.objects.create(text='Тест', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+
+        with run_on_commit():
+            Follow.objects.filter(user=other).delete()
+
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(self.reader.pk, post.pk)]
+        )
+
+    def test_follow_index_keyset_pages(self):
+        """Лента подписок листается по курсору."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(12):
+            Post.objects.create(text=f'Тест {number}', author=self.author)
+
+        response = self.reader_client.get(reverse('follow_index'))
+        cursor = str(response.context['page'].next_cursor)
+        response = self.reader_client.get(reverse('follow_index'),
+                                          {'after': cursor})
+        self.assertEqual(list(response.context['page']),
+                         list(Post.objects.all()[10:]))
@@ -6,10 +6,13 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import run_on_commit
 
 
 class PostPagesTests(TestCase):
@@ -146,6 +149,8 @@ class PaginatorViewsTest(TestCase):
         ])
 
     def setUp(self):
+        # bulk_create не вызывает сигналы, и кэш прошлых тестов не сброшен
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user_author)
 
@@ -195,6 +200,47 @@ class CacheViewTest(TestCase):
         self.assertEqual(context_len, post_len)
 
 
+class FragmentCacheTest(TestCase):
+    """Тестирование сброса кеша лент по поколениям"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='AuthorUser')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test-group')
+        Post.objects.create(text='Первая запись', author=self.user,
+                            group=self.group)
+        self.guest_client = Client()
+
+    def test_new_post_is_visible_immediately(self):
+        """Новая запись сразу появляется на закешированных страницах."""
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': 'test-group'}),
+            reverse('profile', kwargs={'username': 'AuthorUser'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+
+        with run_on_commit():
+            Post.objects.create(text='Вторая запись', author=self.user,
+                                group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Вторая запись')
+
+    def test_unchanged_feed_is_served_from_cache(self):
+        """Без изменений лента не запрашивает записи повторно."""
+        self.guest_client.get(reverse('index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('index'))
+
+        self.assertContains(response, 'Первая запись')
+        self.assertFalse([query for query in queries
+                          if 'FROM "posts_post" INNER JOIN' in query['sql']])
+
+
 class FollowUserTest(TestCase):
     """Тестирование подписи пользователей друг на друга"""
 
@@ -342,3 +388,160 @@ class PostImageViewTest(TestCase):
         expected = f'posts/{self.uploaded.name}'
 
         self.assertEqual(response_data_image, expected)
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+        }
+    }
+)
+class FeedQueriesTest(TestCase):
+    """Число запросов ленты не зависит от размера страницы"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.reader = User.objects.create(username='ReaderUser')
+        self.author = User.objects.create(username='AuthorUser')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test-group')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_posts(self, count):
+        for number in range(count):
+            Post.objects.create(text=f'Тест {number}', author=self.author,
+                                group=self.group)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feed_queries_do_not_grow_with_page(self):
+        """Страница ленты выполняет одинаковое число запросов."""
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': 'test-group'}),
+            reverse('profile', kwargs={'username': 'AuthorUser'}),
+            reverse('follow_index'),
+        )
+        self.create_posts(2)
+        small = [self.count_queries(url) for url in urls]
+        self.create_posts(10)
+        large = [self.count_queries(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+
+@override_settings(POSTS_COMMENTS_PER_PAGE=3, POSTS_PAGE_CACHE_TIMEOUT=0)
+class CommentPaginationTest(TestCase):
+    """Комментарии под записью выводятся страницами"""
+
+    def setUp(self):
+        self.author = get_user_model().objects.create(username='AuthorUser')
+        self.post = Post.objects.create(text='Тест', author=self.author)
+        self.client = Client()
+        self.url = reverse('post', kwargs={'username': 'AuthorUser',
+                                           'post_id': self.post.id})
+
+    def create_comments(self, count):
+        for number in range(count):
+            Comment.objects.create(post=self.post, author=self.author,
+                                   text=f'Комментарий {number}')
+
+    def test_post_shows_first_page_and_loads_more(self):
+        """Страница записи показывает первые комментарии, фрагмент — дальше."""
+        self.create_comments(5)
+        response = self.client.get(self.url)
+        shown = [comment.text for comment in response.context['comments']]
+        self.assertEqual(shown, ['Комментарий 0', 'Комментарий 1',
+                                 'Комментарий 2'])
+
+        cursor = str(response.context['comments_cursor'])
+        response = self.client.get(
+            reverse('post_comments', kwargs={'username': 'AuthorUser',
+                                             'post_id': self.post.id}),
+            {'after': cursor},
+        )
+        shown = [comment.text for comment in response.context['comments']]
+        self.assertEqual(shown, ['Комментарий 3', 'Комментарий 4'])
+        self.assertIsNone(response.context['comments_cursor'])
+
+    def test_no_more_link_for_short_thread(self):
+        """Без лишних комментариев ссылки «Показать ещё» нет."""
+        self.create_comments(3)
+        response = self.client.get(self.url)
+        self.assertIsNone(response.context['comments_cursor'])
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_drifted_comment_count_does_not_break_page(self):
+        """Завышенный счётчик комментариев не ломает страницу записи."""
+        self.create_comments(2)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=50)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['comments']), 2)
+        self.assertIsNone(response.context['comments_cursor'])
+
+    def test_comment_queries_do_not_grow(self):
+        """Авторы комментариев загружаются одним JOIN."""
+        self.create_comments(1)
+        # Первый запрос заполняет кэш счётчиков автора.
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self.create_comments(2)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+        self.assertEqual(len(small), len(large))
+
+
+@override_settings(POSTS_PAGE_CACHE_TIMEOUT=0)
+class GroupListTest(TestCase):
+    """Список групп упорядочен по активности и строится без N+1"""
+
+    def setUp(self):
+        self.author = get_user_model().objects.create(username='AuthorUser')
+
+    def create_groups(self, count):
+        start = Group.objects.count()
+        for number in range(start, start + count):
+            group = Group.objects.create(title=f'Группа {number}',
+                                         slug=f'group-{number}')
+            Post.objects.create(text=f'Запись {number}', author=self.author,
+                                group=group)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('group_list'))
+        return len(queries)
+
+    def test_groups_are_ordered_by_latest_post(self):
+        """Группа со свежей записью идёт первой и ссылается на себя."""
+        self.create_groups(3)
+        Post.objects.create(text='Свежая запись', author=self.author,
+                            group=Group.objects.get(slug='group-0'))
+
+        response = self.client.get(reverse('group_list'))
+
+        self.assertEqual(
+            [stats.group.slug for stats in response.context['page']],
+            ['group-0', 'group-2', 'group-1']
+        )
+        self.assertContains(
+            response, reverse('group', kwargs={'slug': 'group-0'})
+        )
+        self.assertContains(response, 'Свежая запись')
+
+    def test_queries_do_not_grow_with_groups(self):
+        """Число запросов не зависит от числа групп на странице."""
+        self.create_groups(2)
+        small = self.count_queries()
+        self.create_groups(8)
+        self.assertEqual(self.count_queries(), small)
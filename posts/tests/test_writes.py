@@ -0,0 +1,155 @@
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import follow_graph, writes
+from posts.author_stats import author_stats
+from posts.models import Follow, Post, UserStats
+
+
+def flaky(failures, message='database is locked'):
+    """Функция записи, которая падает failures раз, затем пишет."""
+    calls = []
+
+    def write(user):
+        calls.append(1)
+        if len(calls) <= failures:
+            Post.objects.create(author=user, text='Откатится')
+            raise OperationalError(message)
+        return Post.objects.create(author=user, text='Сохранится')
+
+    write.calls = calls
+    return write
+
+
+@override_settings(POSTS_WRITE_BACKOFF=0, POSTS_WRITE_RETRIES=3)
+class WriteRetryTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='writer')
+
+    def test_locked_write_is_retried(self):
+        """Занятая база: транзакция откатывается и повторяется."""
+        write = flaky(2)
+
+        post = writes.run(write, self.user)
+
+        self.assertEqual(len(write.calls), 3)
+        self.assertEqual(list(Post.objects.all()), [post])
+        stats = writes.write_stats()
+        self.assertEqual((stats['writes'], stats['retries'],
+                          stats['failures']), (1, 2, 0))
+
+    def test_retried_follow_keeps_cached_counts(self):
+        """Откатанная попытка подписки не меняет счётчики в кэше."""
+        author = get_user_model().objects.create(username='author')
+        follow_graph.follower_counts([author.pk])
+        author_stats(author)
+        calls = []
+
+        def follow():
+            calls.append(1)
+            Follow.objects.create(user=self.user, author=author)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+
+        writes.run(follow)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(follow_graph.follower_counts([author.pk]),
+                         {author.pk: 1})
+        self.assertEqual(author_stats(author).follower_count, 1)
+        self.assertEqual(follow_graph.followees(self.user.pk), {author.pk})
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count, 1
+        )
+
+    def test_retries_are_bounded(self):
+        """После POSTS_WRITE_RETRIES повторов поднимается WriteBusy."""
+        write = flaky(10)
+
+        with self.assertRaises(writes.WriteBusy):
+            writes.run(write, self.user)
+
+        self.assertEqual(len(write.calls), 4)
+        self.assertFalse(Post.objects.exists())
+        self.assertEqual(writes.write_stats()['failures'], 1)
+
+    def test_other_errors_are_not_retried(self):
+        """Прочие ошибки базы пробрасываются сразу."""
+        write = flaky(1, message='no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            writes.run(write, self.user)
+
+        self.assertEqual(len(write.calls), 1)
+
+    def test_stats_command_requires_shared_cache(self):
+        """Счётчики других процессов видны только в общем кэше."""
+        writes.run(flaky(1), self.user)
+        out = StringIO()
+        with self.settings(SHARED_CACHE=True):
+            call_command('write_stats', stdout=out)
+        self.assertIn('Записей: 1, повторов: 1', out.getvalue())
+
+        with self.settings(SHARED_CACHE=False):
+            with self.assertRaisesMessage(CommandError, 'YATUBE_CACHE_DIR'):
+                call_command('write_stats', stdout=StringIO())
+
+    @override_settings(POSTS_WRITE_TIMEOUT=0.05)
+    def test_lock_wait_is_bounded(self):
+        """Запись не ждёт очереди дольше POSTS_WRITE_TIMEOUT."""
+        taken, release = threading.Event(), threading.Event()
+
+        def hold():
+            with writes._lock:
+                taken.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        self.addCleanup(holder.join)
+        self.addCleanup(release.set)
+        taken.wait()
+
+        writes.reset_wait()
+        with self.assertRaises(writes.WriteBusy):
+            writes.run(Post.objects.create, author=self.user, text='Нет')
+        self.assertGreaterEqual(writes.waited_ms(), 50)
+
+
+class WriteTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='writer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_reports_wait_time(self):
+        """Ответ на запись сообщает время ожидания в Server-Timing."""
+        response = self.client.post(reverse('new_post'), {'text': 'Текст'})
+
+        self.assertTrue(
+            response['Server-Timing'].startswith('db-write-wait;dur=')
+        )
+        self.assertFalse(
+            self.client.get(reverse('index')).has_header('Server-Timing')
+        )
+
+    def test_busy_database_returns_503(self):
+        """Отказ по таймауту отдаётся как 503 с Retry-After."""
+        with mock.patch('posts.views.writes.run',
+                        side_effect=writes.WriteBusy):
+            response = self.client.post(reverse('new_post'),
+                                        {'text': 'Текст'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Post.objects.exists())
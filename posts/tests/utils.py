@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """
+    Выполняет колбэки transaction.on_commit, добавленные внутри блока.
+    TestCase держит тест в транзакции, которая не фиксируется, поэтому
+    сами они не вызываются.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, func in callbacks:
+        func()
@@ -0,0 +1,100 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+
+BUCKET_KEY = "posts:throttle:{}:{}"
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """«10/m» — десять запросов в минуту, столько же можно сразу."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+def _session_user_id(request):
+    # Только кэш сессий (SESSION_ENGINE cached_db): кука, которой нет
+    # среди сохранённых сессий, пользователя не даёт, а база не читается.
+    # Без куки cache_key создал бы новый ключ и проверил его в базе.
+    session = getattr(request, "session", None)
+    if session is None or not session.session_key:
+        return None
+    cache_key = getattr(session, "cache_key", None)
+    if cache_key is None:
+        return None
+    data = caches[settings.SESSION_CACHE_ALIAS].get(cache_key) or {}
+    return data.get(SESSION_KEY)
+
+
+def client_id(request):
+    """
+    Кому принадлежит корзина: пользователь из сессии, иначе адрес. Новая
+    сессия того же пользователя получает ту же корзину, а случайная кука
+    ничего не меняет. Отказ обходится без запросов SQL.
+    """
+    user_id = _session_user_id(request)
+    identity = (f"user:{user_id}" if user_id
+                else f"ip:{request.META.get('REMOTE_ADDR', '')}")
+    return hashlib.md5(identity.encode()).hexdigest()
+
+
+def take(scope, identity, now=None):
+    """
+    Забирает жетон из корзины scope для identity. Возвращает 0, если
+    запрос разрешён, иначе число секунд до появления жетона.
+
+    Корзина хранится в кэше парой (жетоны, время). Чтение и запись не
+    атомарны: при одновременных запросах одного клиента изредка
+    пройдёт лишний запрос, зато отказ стоит одного чтения из кэша.
+    """
+    rate = settings.POSTS_THROTTLE_RATES.get(scope)
+    if not rate:
+        return 0
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    now = time.time() if now is None else now
+    key = BUCKET_KEY.format(scope, identity)
+
+    tokens, updated = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill
+    # Через period корзина снова полна, и ключ можно забыть.
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def rejected(request, scope):
+    """Ответ 429 с Retry-After или None, если запрос разрешён."""
+    wait = take(scope, client_id(request))
+    if not wait:
+        return None
+    response = HttpResponse("Слишком много запросов, попробуйте позже.",
+                            status=429,
+                            content_type="text/plain; charset=utf-8")
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+def throttle(scope, methods=("POST",)):
+    """
+    Ограничивает частоту запросов methods к представлению по корзине
+    scope из POSTS_THROTTLE_RATES. Ставится над login_required, чтобы
+    отказ не загружал пользователя.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                response = rejected(request, scope)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,59 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+# Должно совпадать с тегом {% thumbnail %} в posts/includes/post_card.html,
+# иначе sorl посчитает миниатюру другой и построит её при отрисовке.
+CARD_GEOMETRY = "960x339"
+CARD_OPTIONS = {"crop": "center", "upscale": True}
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def generate(name):
+    """Строит миниатюру карточки и записывает её в хранилище sorl."""
+    return get_thumbnail(name, CARD_GEOMETRY, **CARD_OPTIONS)
+
+
+def _run(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception("Не удалось построить миниатюру %s", name)
+    finally:
+        # Поток пула живёт дольше запроса: соединение закрывается, чтобы
+        # не держать его открытым между задачами.
+        connection.close()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+        return _pool
+
+
+def _submit(name):
+    return _executor().submit(_run, name)
+
+
+def schedule(post):
+    """
+    Ставит построение миниатюры в фоновый пул после фиксации транзакции,
+    чтобы первая отрисовка ленты не декодировала изображение.
+    """
+    if not post.image:
+        return
+    transaction.on_commit(partial(_submit, post.image.name))
@@ -0,0 +1,216 @@
+import heapq
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+
+from . import counts, follow_graph
+from .models import FeedEntry, Follow, Post, UserStats
+
+FEED_ORDERING = ("-feed_date", "-feed_post")
+
+
+def pull_authors(author_ids):
+    """
+    Из переданных авторов возвращает тех, чьи записи не раскладываются по
+    ящикам подписчиков, а читаются при запросе ленты (слишком много
+    подписчиков). Число подписчиков берётся из графа подписок.
+    """
+    threshold = settings.POSTS_FANOUT_THRESHOLD
+    return {author_id for author_id, count
+            in follow_graph.follower_counts(author_ids).items()
+            if count > threshold}
+
+
+def fan_out(post):
+    if pull_authors([post.author_id]):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=post.id, pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    if pull_authors([author_id]):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "id", "pub_date"
+    )[:settings.POSTS_FANOUT_BACKFILL]
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def follower_removed(author_id):
+    """
+    Вызывается после отписки. Если автор опустился до порога, его записи,
+    опубликованные, пока он читался при запросе, раскладываются по ящикам
+    оставшихся подписчиков: иначе они пропали бы из их лент.
+    """
+    count = UserStats.objects.filter(user_id=author_id).values_list(
+        "follower_count", flat=True
+    ).first()
+    if count != settings.POSTS_FANOUT_THRESHOLD:
+        return 0
+    return _fill(
+        f"AND f.author_id = %s AND p.id IN ("
+        f"SELECT id FROM {Post._meta.db_table} WHERE author_id = %s "
+        f"ORDER BY pub_date DESC, id DESC LIMIT %s)",
+        [author_id, author_id, settings.POSTS_FANOUT_BACKFILL],
+    )
+
+
+class MergedFeed:
+    """
+    Лента из нескольких источников с одной сортировкой: ящика подписчика
+    и записей каждого автора, читаемого при запросе. Каждый источник
+    читается своим диапазоном индекса не дальше нужной строки, а строки
+    сливаются в Python, поэтому SQLite не сортирует их во временном
+    B-дереве. Поддерживает то, что нужно Paginator и KeysetPaginator.
+    """
+
+    ordered = True
+    model = Post
+
+    def __init__(self, sources, count_hint=None):
+        self.sources = sources
+        self._count_hint = count_hint
+
+    @property
+    def query(self):
+        return self.sources[0].query
+
+    def _chain(self, method, *args, **kwargs):
+        return MergedFeed(
+            [getattr(source, method)(*args, **kwargs)
+             for source in self.sources],
+            self._count_hint,
+        )
+
+    def filter(self, *args, **kwargs):
+        return self._chain("filter", *args, **kwargs)
+
+    def order_by(self, *fields):
+        return self._chain("order_by", *fields)
+
+    def for_feed(self, *fields):
+        return self._chain("for_feed", *fields)
+
+    def with_cached_count(self, *scopes):
+        return MergedFeed(self.sources, scopes)
+
+    def count(self):
+        def compute():
+            return sum(source.count() for source in self.sources)
+        if self._count_hint is None:
+            return compute()
+        return counts.cached_count(self._count_hint, compute)
+
+    def _merge(self, limit=None):
+        ordering = self.query.order_by
+        rows = [source if limit is None else source[:limit]
+                for source in self.sources]
+        return heapq.merge(
+            *rows,
+            key=attrgetter(*(name.lstrip("-") for name in ordering)),
+            reverse=ordering[0].startswith("-"),
+        )
+
+    def __iter__(self):
+        return self._merge()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(islice(self._merge(index.stop), index.start,
+                               index.stop))
+        rows = list(islice(self._merge(index + 1), index, index + 1))
+        if not rows:
+            raise IndexError(index)
+        return rows[0]
+
+
+def _inbox(user, excluded):
+    posts = Post.objects.filter(feed_entries__user=user)
+    if excluded:
+        # Записи, разложенные до того, как автор перешёл порог, читаются
+        # вместе с остальными его записями.
+        posts = posts.exclude(author_id__in=excluded)
+    return posts.annotate(
+        feed_date=F("feed_entries__pub_date"),
+        feed_post=F("feed_entries__post_id"),
+    ).order_by(*FEED_ORDERING)
+
+
+def _authored(author_id):
+    return Post.objects.filter(author_id=author_id).annotate(
+        feed_date=F("pub_date"),
+        feed_post=F("id"),
+    ).order_by(*FEED_ORDERING)
+
+
+def feed_for(user):
+    """
+    Лента подписок пользователя.
+
+    Обычно это чтение диапазона индекса (user, pub_date) по его ящику.
+    Записи авторов-«знаменитостей» в ящики не попадают: каждый такой
+    автор читается диапазоном индекса (author, pub_date), и источники
+    сливаются в MergedFeed. Подписки берутся из кэша графа подписок.
+    """
+    followees = follow_graph.followees(user.pk)
+    if not followees:
+        return Post.objects.none()
+    pulled = pull_authors(followees)
+    inbox = _inbox(user, pulled)
+    if not pulled:
+        return inbox
+    return MergedFeed([inbox, *map(_authored, sorted(pulled))])
+
+
+def _fill(condition="", params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FeedEntry._meta.db_table} "
+            f"(user_id, post_id, pub_date) "
+            f"SELECT f.user_id, p.id, p.pub_date "
+            f"FROM {Follow._meta.db_table} f "
+            f"JOIN {Post._meta.db_table} p ON p.author_id = f.author_id "
+            f"LEFT JOIN {UserStats._meta.db_table} s "
+            f"ON s.user_id = f.author_id "
+            f"WHERE COALESCE(s.follower_count, 0) <= %s {condition} "
+            f"ON CONFLICT DO NOTHING",
+            [settings.POSTS_FANOUT_THRESHOLD, *params],
+        )
+        return cursor.rowcount
+
+
+def fan_out_range(first_id, last_id):
+    """fan_out для диапазона id записей, загруженных одной пачкой."""
+    return _fill("AND p.id BETWEEN %s AND %s", [first_id, last_id])
+
+
+def rebuild():
+    """
+    Заново раскладывает записи по ящикам подписчиков одним запросом
+    INSERT ... SELECT. Нужна после массовой загрузки, которая обходит
+    сигналы.
+    """
+    FeedEntry.objects.all().delete()
+    return _fill()
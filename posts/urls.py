@@ -1,12 +1,20 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("group/<slug:slug>/", views.group_posts, name="group"),
+    path("group/<slug:slug>/export/", views.group_export,
+         name="group_export"),
     path("", views.index, name="index"),
     path("group/", views.group_list, name="group_list"),
     path("new/", views.new_post, name="new_post"),
+    path("search/", views.search, name="search"),
+    path("api/v1/posts/", api.index, name="api_index"),
+    path("api/v1/posts/<int:post_id>/", api.post_view, name="api_post"),
+    path("api/v1/group/<slug:slug>/", api.group_posts, name="api_group"),
+    path("api/v1/profile/<str:username>/", api.profile,
+         name="api_profile"),
     path(
         "follow/",
         views.follow_index,
@@ -22,8 +30,18 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow"
     ),
+    path(
+        "<str:username>/export/",
+        views.profile_export,
+        name="profile_export"
+    ),
     path("<str:username>/", views.profile, name="profile"),
     path("<str:username>/<int:post_id>/", views.post_view, name="post"),
+    path(
+        "<str:username>/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments"
+    ),
     path(
         "<str:username>/<int:post_id>/edit/",
         views.post_edit,
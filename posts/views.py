@@ -1,33 +1,43 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import thumbnails, writes
+from .author_stats import author_stats
+from .export import FORMATS, export_response
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .generations import fragment_context
+from .middleware import tag_response
+from .models import Follow, Group, GroupStats, Post, User
+from .pagination import KeysetPaginator, get_feed_page
+from .search import search as search_posts
+from .throttling import throttle
+from .timeline import feed_for
 
 
 def index(request):
-    post_list = Post.objects.select_related("group")
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    tag_response(request, "index", "groups")
+    post_list = Post.objects.for_feed().with_cached_count("index")
+    paginator, page = get_feed_page(request, post_list, 10)
     return render(
         request,
         "index.html",
         {
             "page": page,
             "post_list": post_list,
-            "paginator": paginator
+            "paginator": paginator,
+            **fragment_context("index", "groups"),
         }
     )
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 12)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    tag_response(request, f"group:{group.pk}")
+    posts = group.posts.for_feed().with_cached_count(f"group:{group.pk}")
+    paginator, page = get_feed_page(request, posts, 12)
     return render(
         request,
         "group.html", {
@@ -35,15 +45,44 @@ def group_posts(request, slug):
             "group": group,
             "posts": posts,
             "paginator": paginator,
+            **fragment_context(f"group:{group.pk}"),
         }
     )
 
 
-def group_list(request):
-    groups = Group.objects.all()
-    return render(request, "posts/group_list.html", {"groups": groups})
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    export_format = request.GET.get("format", "jsonl")
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest()
+    return export_response(group.posts.all(), export_format,
+                           f"group-{group.slug}")
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    page = None
+    if query:
+        page = search_posts(query, 10, after=request.GET.get("after"))
+    return render(request, "posts/search.html", {"query": query,
+                                                 "page": page})
 
 
+def group_list(request):
+    # Порядок и числа берутся из GroupStats: страница строится двумя
+    # запросами (COUNT и выборка) при любом числе групп.
+    tag_response(request, "index", "groups")
+    stats = GroupStats.objects.select_related(
+        "group", "latest_post__author"
+    ).defer("latest_post__text", "latest_post__text_html")
+    paginator = Paginator(stats, 20)
+    page = paginator.get_page(request.GET.get("page"))
+    return render(request, "posts/group_list.html",
+                  {"page": page, "paginator": paginator})
+
+
+@throttle("post")
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -52,47 +91,91 @@ def new_post(request):
 
     post = form.save(commit=False)
     post.author = request.user
-    form.save()
+
+    def save():
+        form.save()
+        thumbnails.schedule(post)
+
+    writes.run(save)
     return redirect("index")
 
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    following = (
-        request.user.is_authenticated and
-        Follow.objects.filter(
-            author=author, user=request.user
-        ).exists()
-    )
+    tag_response(request, f"author:{author.pk}", "groups")
+    stats = author_stats(author, request.user)
+    post_list = author.posts.for_feed().with_count(stats.post_count)
+    paginator, page = get_feed_page(request, post_list, 5)
 
     context = {"page": page,
                "author": author,
-               "post_count": post_count,
+               "post_count": stats.post_count,
+               "author_stats": stats,
                "paginator": paginator,
-               "following": following}
+               "following": stats.following,
+               **fragment_context(f"author:{author.pk}", "groups")}
     return render(request, "posts/profile.html", context)
 
 
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    export_format = request.GET.get("format", "jsonl")
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest()
+    return export_response(author.posts.all(), export_format,
+                           f"{author.username}-posts")
+
+
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    count = post.author.posts.count()
-    comments = post.comments.all()
+    post = get_object_or_404(Post.objects.select_related("author", "group"),
+                             id=post_id, author__username=username)
+    tag_response(request, f"post:{post.pk}", f"author:{post.author_id}",
+                 "groups")
+    stats = author_stats(post.author)
+    per_page = settings.POSTS_COMMENTS_PER_PAGE
+    keyset = KeysetPaginator(_comment_list(post), per_page)
+    comments = keyset.object_list[:per_page]
+    # Курсор строится по уже загруженной странице: хранимый счётчик может
+    # разойтись с таблицей, и комментариев окажется меньше обещанного.
+    loaded = list(comments)
+    comments_cursor = None
+    if len(loaded) == per_page and post.comment_count > per_page:
+        comments_cursor = keyset.cursor_for(loaded[-1])
     form = CommentForm()
     context = {
         "post": post,
         "author": post.author,
-        "count": count,
+        "count": stats.post_count,
+        "author_stats": stats,
         "form": form,
         "comments": comments,
+        "comments_cursor": comments_cursor,
     }
     return render(request, "posts/post.html", context)
 
 
+def _comment_list(post):
+    return post.comments.select_related("author").defer(
+        "text", "excerpt"
+    ).order_by("created", "id")
+
+
+def post_comments(request, username, post_id):
+    """Следующая страница комментариев фрагментом для «Показать ещё»."""
+    post = get_object_or_404(Post.objects.select_related("author"),
+                             id=post_id, author__username=username)
+    tag_response(request, f"post:{post.pk}")
+    paginator = KeysetPaginator(_comment_list(post),
+                                settings.POSTS_COMMENTS_PER_PAGE)
+    page = paginator.get_page(after=request.GET.get("after"))
+    return render(request, "posts/includes/comment_list.html", {
+        "post": post,
+        "comments": page,
+        "comments_cursor": page.next_cursor,
+    })
+
+
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
     if request.user != post.author:
@@ -102,7 +185,12 @@ def post_edit(request, username, post_id):
                     files=request.FILES or None,
                     instance=post)
     if request.method == 'POST' and form.is_valid():
-        post = form.save()
+        def save():
+            form.save()
+            if "image" in form.changed_data:
+                thumbnails.schedule(post)
+
+        writes.run(save)
         return redirect("post", username=username,
                         post_id=post_id)
 
@@ -111,6 +199,7 @@ def post_edit(request, username, post_id):
                                               "is_edit": True})
 
 
+@throttle("comment")
 @login_required()
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
@@ -122,40 +211,46 @@ def add_comment(request, username, post_id):
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
-    form.save()
+    writes.run(form.save)
 
     return redirect("post", username, post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = feed_for(request.user).for_feed().with_cached_count(
+        "index", f"follow:{request.user.pk}"
+    )
+    paginator, page = get_feed_page(request, post_list, 10)
     return render(
         request,
         "posts/follow.html",
         {
             "page": page,
-            "paginator": paginator
+            "paginator": paginator,
+            **fragment_context("index", "groups",
+                               f"follow:{request.user.pk}"),
         }
     )
 
 
+@throttle("follow", methods=("GET", "POST"))
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        writes.run(Follow.objects.get_or_create,
+                   user=request.user, author=author)
 
     return redirect("profile", username=username)
 
 
+@throttle("follow", methods=("GET", "POST"))
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    writes.run(Follow.objects.filter(user=request.user,
+                                     author=author).delete)
     return redirect("profile", username=username)
 
 
@@ -0,0 +1,104 @@
+import itertools
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connections,
+                       transaction)
+
+STATS_KEY = "posts:writes:{}"
+STATS = ("writes", "retries", "failures", "wait_ms")
+
+_lock = threading.RLock()
+_timing = threading.local()
+
+
+class WriteBusy(Exception):
+    """База не приняла запись за POSTS_WRITE_TIMEOUT секунд."""
+
+
+def _locked(error):
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+
+def _add(name, amount=1):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, amount)
+
+
+def write_stats():
+    values = cache.get_many([STATS_KEY.format(name) for name in STATS])
+    return {name: values.get(STATS_KEY.format(name), 0) for name in STATS}
+
+
+def waited_ms():
+    """
+    Сколько текущий поток ждал записи с последнего reset_wait(), или
+    None, если записей не было.
+    """
+    waited = getattr(_timing, "waited", None)
+    return None if waited is None else waited * 1000
+
+
+def reset_wait():
+    _timing.waited = None
+
+
+def _record(waited, failed=False):
+    _add("failures" if failed else "writes")
+    _add("wait_ms", round(waited * 1000))
+    _timing.waited = (getattr(_timing, "waited", None) or 0.0) + waited
+
+
+def run(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Выполняет func в транзакции, по одной записи на процесс.
+
+    Ожидание ограничено POSTS_WRITE_TIMEOUT. Если база занята другим
+    процессом, транзакция повторяется до POSTS_WRITE_RETRIES раз с
+    экспоненциальной задержкой со случайным разбросом. Запись, вложенная
+    в чужую транзакцию, не повторяется: откат затронул бы внешний код.
+    Сигналы меняют кэш через transaction.on_commit, поэтому откатанная
+    попытка не оставляет в нём следов.
+    Когда время вышло, поднимается WriteBusy. Ожиданием считается всё,
+    кроме удачной попытки: очередь, неудачные попытки и паузы.
+    """
+    connection = connections[using]
+    started = time.perf_counter()
+    deadline = started + settings.POSTS_WRITE_TIMEOUT
+    if not _lock.acquire(timeout=settings.POSTS_WRITE_TIMEOUT):
+        _record(time.perf_counter() - started, failed=True)
+        raise WriteBusy()
+    waited = time.perf_counter() - started
+    try:
+        for attempt in itertools.count(1):
+            attempt_started = time.perf_counter()
+            try:
+                with transaction.atomic(using=using):
+                    result = func(*args, **kwargs)
+            except OperationalError as error:
+                if not _locked(error) or connection.in_atomic_block:
+                    raise
+                delay = random.uniform(
+                    0, settings.POSTS_WRITE_BACKOFF * 2 ** attempt
+                )
+                waited += time.perf_counter() - attempt_started
+                if (attempt > settings.POSTS_WRITE_RETRIES
+                        or time.perf_counter() + delay > deadline):
+                    _record(waited, failed=True)
+                    raise WriteBusy() from error
+                _add("retries")
+                time.sleep(delay)
+                waited += delay
+            else:
+                _record(waited)
+                return result
+    finally:
+        _lock.release()
@@ -35,6 +35,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts.middleware.ThrottleMiddleware',
+    'posts.middleware.ReplicaRoutingMiddleware',
+    'posts.middleware.WriteTimingMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -64,6 +68,7 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
@@ -116,3 +121,120 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Кэш, общий для всех процессов, в каталоге YATUBE_CACHE_DIR. LocMemCache
+# у каждого процесса свой: поколение или ключ, сброшенные в одном
+# процессе, остаются в других, поэтому сроки сбрасываемых сигналами
+# кэшей с ним короткие. Команды warm_follow_graph, page_cache_stats и
+# write_stats без YATUBE_CACHE_DIR не запускаются, а recount_stats и
+# rebuild_group_stats предупреждают, что сброс кэша до сайта не дойдёт.
+if os.environ.get('YATUBE_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['YATUBE_CACHE_DIR'],
+    }
+SHARED_CACHE = 'locmem' not in CACHES['default']['BACKEND']
+LOCAL_CACHE_TIMEOUT = 60
+
+
+# Лента подписок собирается при публикации записи (fan-out on write).
+# Записи авторов, у которых подписчиков больше порога, читаются при
+# запросе ленты.
+POSTS_FANOUT_THRESHOLD = 1000
+POSTS_FANOUT_BACKFILL = 500
+
+# Множества подписок и числа подписчиков в кэше (posts.follow_graph).
+# Обновляются сигналами Follow, срок ограничивает расхождение после сбоев.
+POSTS_FOLLOW_GRAPH_TIMEOUT = 60 * 60 if SHARED_CACHE else LOCAL_CACHE_TIMEOUT
+
+# Фрагменты лент сбрасываются счётчиками поколений, поэтому живут долго.
+POSTS_FRAGMENT_CACHE_TIMEOUT = (60 * 60 * 4 if SHARED_CACHE
+                                else LOCAL_CACHE_TIMEOUT)
+
+# Карточки записей хранятся под ключом из id, updated и числа
+# комментариев, поэтому устаревшая карточка просто не запрашивается.
+POSTS_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кэш целых страниц для анонимных посетителей. В режиме отладки выключен.
+POSTS_PAGE_CACHE_TIMEOUT = 0 if DEBUG else (
+    60 * 60 if SHARED_CACHE else LOCAL_CACHE_TIMEOUT
+)
+
+# Миниатюры новых изображений строятся фоновым пулом потоков.
+POSTS_THUMBNAIL_WORKERS = 2
+
+# Выгрузка записей читает курсор пачками такого размера.
+POSTS_EXPORT_CHUNK_SIZE = 2000
+
+# Комментарии под записью подгружаются страницами такого размера.
+POSTS_COMMENTS_PER_PAGE = 20
+
+# Число записей для пагинаторов лент берётся из кэша. Меньшие числа после
+# изменений пересчитываются сразу, большие отдаются как оценка и
+# уточняются после ответа не чаще заданного интервала.
+POSTS_COUNT_ESTIMATE_FROM = 10000
+POSTS_COUNT_REFRESH_INTERVAL = 60
+# Точное число хранится, пока не изменились поколения его областей.
+POSTS_COUNT_CACHE_TIMEOUT = None if SHARED_CACHE else LOCAL_CACHE_TIMEOUT
+
+# Счётчики автора и состояние подписки для боковой карточки. Ключи
+# сбрасываются сигналами, срок ограничивает расхождение после сбоев.
+POSTS_AUTHOR_STATS_TIMEOUT = 60 * 60 if SHARED_CACHE else LOCAL_CACHE_TIMEOUT
+
+# Реплики только для чтения: псевдонимы из DATABASES. Файл реплики
+# обновляется командой sync_replicas. Тесты запускаются без
+# YATUBE_REPLICA_DB.
+POSTS_READ_REPLICAS = []
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    POSTS_READ_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+POSTS_REPLICA_VIEWS = [
+    'posts.views.index',
+    'posts.views.group_posts',
+    'posts.views.profile',
+    'posts.views.post_view',
+    'posts.views.follow_index',
+    'posts.views.group_list',
+]
+# Сколько секунд после записи клиент читает из основной базы.
+POSTS_PRIMARY_PIN_SECONDS = 10
+
+# PRAGMA для каждого нового соединения SQLite. WAL позволяет читать во
+# время записи, synchronous=NORMAL в режиме WAL не синхронизирует диск
+# на каждой фиксации. cache_size задаётся в КиБ (отрицательное число).
+POSTS_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Запись в SQLite идёт по одной на процесс (posts.writes). Ожидание
+# ограничено таймаутом; при «database is locked» транзакция повторяется
+# с экспоненциальной задержкой от POSTS_WRITE_BACKOFF секунд.
+POSTS_WRITE_TIMEOUT = 5
+POSTS_WRITE_RETRIES = 5
+POSTS_WRITE_BACKOFF = 0.05
+POSTS_WRITE_RETRY_AFTER = 1
+
+# Корзины жетонов для записи: «N/период» — N запросов за период (s, m,
+# h, d) и столько же подряд. Пустой словарь отключает ограничения.
+POSTS_THROTTLE_RATES = {
+    'post': '10/m',
+    'comment': '20/m',
+    'follow': '30/m',
+    'signup': '5/h',
+}
+# Корзина авторизованного пользователя общая для всех его сессий: id
+# берётся из сессии в кэше, поэтому сессии хранятся в базе и в кэше.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Представления без декоратора throttle: полное имя -> корзина.
+POSTS_THROTTLED_VIEWS = {
+    'users.views.SignUp': 'signup',
+}